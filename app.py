@@ -1,4 +1,5 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -15,36 +16,40 @@ st.set_page_config(
 )
 
 
-@st.cache_data
+def downcast_integers(df):
+    int_cols = df.select_dtypes("integer").columns
+    if len(int_cols) > 0:
+        df[int_cols] = df[int_cols].apply(pd.to_numeric, downcast="integer")
+    return df
+
+
+def read_processed(path):
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return downcast_integers(pd.read_parquet(parquet_path, engine="pyarrow", dtype_backend="pyarrow"))
+    return downcast_integers(pd.read_csv(path, dtype_backend="pyarrow"))
+
+
+@st.cache_resource(show_spinner=False)
 def load_csv(name):
-    return pd.read_csv(os.path.join(DATA_DIR, name))
+    return read_processed(os.path.join(DATA_DIR, name))
 
 
+@st.cache_resource(show_spinner=False)
 def load_csv_safe(name):
     path = os.path.join(DATA_DIR, name)
     if os.path.exists(path):
-        return pd.read_csv(path)
+        return read_processed(path)
     return pd.DataFrame()
 
 
-def load_all():
-    data = {}
-    data["ratings"] = load_csv("current_team_ratings.csv")
-    data["elo_history"] = load_csv("elo_ratings_history.csv")
-    data["calibration"] = load_csv("live_model_calibration_2020_plus.csv")
-    data["backtest"] = load_csv("rolling_backtest_results.csv")
-    data["edge_pre"] = load_csv("edge_simulation_results.csv")
-    data["edge_live"] = load_csv_safe("live_edge_simulation_results.csv")
-    data["inplay"] = load_csv_safe("high_confidence_inplay_odds.csv")
-    data["odds_matches"] = load_csv("match_metadata_with_odds.csv")
-    data["bucket_model"] = load_csv("statistical_bucket_model_stabilized.csv")
-    data["high_conf"] = load_csv_safe("high_confidence_snapshots_85_plus.csv")
-    data["realistic_sim"] = load_csv_safe("realistic_edge_simulation_results.csv")
-    data["timestamp_audit"] = load_csv_safe("timestamp_audit_results.csv")
-    return data
-
+@st.cache_resource(show_spinner=False)
+def load_csv_sorted(name, by, ascending=True):
+    df = load_csv_safe(name)
+    if len(df) == 0:
+        return df
+    return df.sort_values(by, ascending=ascending)
 
-data = load_all()
 
 st.sidebar.title("Crickedge")
 st.sidebar.caption("IPL Cricket Analytics & Edge Detection")
@@ -57,22 +62,37 @@ page = st.sidebar.radio(
 BRAND_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
                 "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
 
+PERCENT_COLUMN = st.column_config.NumberColumn(format="%.1f%%")
+SIGNED_PERCENT_COLUMN = st.column_config.NumberColumn(format="%+.1f%%")
+THRESHOLD_COLUMN = st.column_config.NumberColumn(format="%.0f%%")
+
+WEBGL_MIN_POINTS = 1000
+
+
+def binned_histogram(values, nbins, x_title, color):
+    values = values.to_numpy(dtype=float, na_value=np.nan)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=nbins)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                           marker_color=color))
+    fig.update_layout(bargap=0, xaxis_title=x_title, yaxis_title="count")
+    return fig
+
 
 def page_overview():
     st.title("Crickedge – IPL Analytics Dashboard")
     st.markdown("Cricket analytics platform combining Elo ratings, statistical bucket models, "
                 "bookmaker odds analysis, and in-play edge detection for IPL matches (2008–2025).")
 
-    ratings = data["ratings"]
-    elo_hist = data["elo_history"]
-    edge_pre = data["edge_pre"]
-    edge_live = data["edge_live"]
-    cal = data["calibration"]
-    inplay = data["inplay"]
-    odds_matches = data["odds_matches"]
-    backtest = data["backtest"]
-    bucket_model = data["bucket_model"]
-    high_conf = data["high_conf"]
+    ratings = load_csv("current_team_ratings.csv")
+    elo_hist = load_csv("elo_ratings_history.csv")
+    edge_pre = load_csv("edge_simulation_results.csv")
+    edge_live = load_csv_safe("live_edge_simulation_results.csv")
+    cal = load_csv("live_model_calibration_2020_plus.csv")
+    inplay = load_csv_safe("high_confidence_inplay_odds.csv")
+    odds_matches = load_csv("match_metadata_with_odds.csv")
+    backtest = load_csv("rolling_backtest_results.csv")
+    bucket_model = load_csv("statistical_bucket_model_stabilized.csv")
+    high_conf = load_csv_safe("high_confidence_snapshots_85_plus.csv")
 
     st.subheader("Platform Statistics")
     r1c1, r1c2, r1c3, r1c4, r1c5, r1c6 = st.columns(6)
@@ -122,13 +142,13 @@ def page_overview():
 
     with col_l:
         st.markdown("**Pre-Match (Elo vs Pinnacle)**")
-        pre_df = edge_pre.copy()
-        pre_df["threshold"] = pre_df["threshold"].apply(lambda x: f"{float(x):.0%}")
+        pre_df = edge_pre.assign(threshold=edge_pre["threshold"].astype(float) * 100)
         st.dataframe(
             pre_df[["threshold", "total_bets", "wins", "win_rate", "roi_pct", "max_drawdown_pct"]].rename(
                 columns={"threshold": "Threshold", "total_bets": "Bets", "wins": "Wins",
                           "win_rate": "Win Rate", "roi_pct": "ROI %", "max_drawdown_pct": "Max DD %"}
             ),
+            column_config={"Threshold": THRESHOLD_COLUMN},
             use_container_width=True, hide_index=True,
         )
         matches_with_odds = len(odds_matches)
@@ -138,13 +158,13 @@ def page_overview():
     with col_r:
         st.markdown("**In-Play (Model vs Market, 85%+ confidence)**")
         if len(edge_live) > 0:
-            live_df = edge_live.copy()
-            live_df["threshold"] = live_df["threshold"].apply(lambda x: f"{float(x):.0%}")
+            live_df = edge_live.assign(threshold=edge_live["threshold"].astype(float) * 100)
             st.dataframe(
                 live_df[["threshold", "total_trades", "wins", "win_rate", "roi_pct", "max_drawdown_pct"]].rename(
                     columns={"threshold": "Threshold", "total_trades": "Trades", "wins": "Wins",
                               "win_rate": "Win Rate", "roi_pct": "ROI %", "max_drawdown_pct": "Max DD %"}
                 ),
+                column_config={"Threshold": THRESHOLD_COLUMN},
                 use_container_width=True, hide_index=True,
             )
             if len(inplay) > 0:
@@ -196,7 +216,7 @@ def page_overview():
     e2.metric("Lowest Rating", f"{elo_ratings.min():.0f}")
     e3.metric("Rating Spread", f"{elo_ratings.max() - elo_ratings.min():.0f}")
 
-    ratings_sorted = ratings.sort_values("rating", ascending=True)
+    ratings_sorted = load_csv_sorted("current_team_ratings.csv", "rating")
     fig = px.bar(
         ratings_sorted, x="rating", y="team", orientation="h",
         color="rating", color_continuous_scale="RdYlGn",
@@ -208,13 +228,22 @@ def page_overview():
     st.plotly_chart(fig, use_container_width=True)
 
 
+@st.cache_resource(show_spinner=False)
+def build_team_rows(name):
+    elo = load_csv(name)
+    t1 = elo["team_1"].to_numpy()
+    t2 = elo["team_2"].to_numpy()
+    return {team: np.flatnonzero((t1 == team) | (t2 == team))
+            for team in np.unique(np.concatenate([t1, t2]))}
+
+
 def page_elo():
     st.title("Elo Rating System")
     st.markdown("Dynamic Elo ratings for all IPL franchises since 2008, with K-factor decay and "
                 "season-level tracking. Ratings start at 1500 and adjust after each match.")
 
-    elo = data["elo_history"]
-    ratings = data["ratings"]
+    elo = load_csv("elo_ratings_history.csv")
+    ratings = load_csv("current_team_ratings.csv")
 
     tab1, tab2 = st.tabs(["Rating Trajectories", "Current Standings"])
 
@@ -224,18 +253,24 @@ def page_elo():
         selected = st.multiselect("Select teams", teams, default=default_teams)
 
         if selected:
-            traces = []
+            team_rows = build_team_rows("elo_ratings_history.csv")
+            series = []
             for team in selected:
-                team_matches = elo[(elo["team_1"] == team) | (elo["team_2"] == team)].copy()
-                team_matches["team_rating"] = team_matches.apply(
-                    lambda r: r["post_match_rating_team_1"] if r["team_1"] == team
-                    else r["post_match_rating_team_2"], axis=1
-                )
-                team_matches = team_matches.sort_values("date")
-                traces.append(go.Scatter(
-                    x=team_matches["date"], y=team_matches["team_rating"],
-                    mode="lines", name=team, line=dict(width=2),
-                ))
+                team_matches = elo.iloc[team_rows[team]]
+                is_team_1 = team_matches["team_1"].to_numpy() == team
+                team_rating = np.where(is_team_1,
+                                       team_matches["post_match_rating_team_1"].to_numpy(),
+                                       team_matches["post_match_rating_team_2"].to_numpy())
+                dates = team_matches["date"].to_numpy()
+                order = np.argsort(dates, kind="stable")
+                series.append((team, dates[order], team_rating[order]))
+
+            n_points = sum(len(dates) for _, dates, _ in series)
+            trace_type = go.Scattergl if n_points > WEBGL_MIN_POINTS else go.Scatter
+            traces = [
+                trace_type(x=dates, y=rating, mode="lines", name=team, line=dict(width=2))
+                for team, dates, rating in series
+            ]
 
             fig = go.Figure(data=traces)
             fig.update_layout(
@@ -249,10 +284,10 @@ def page_elo():
             st.info("Select at least one team to view rating trajectories.")
 
     with tab2:
-        r = ratings.sort_values("rating", ascending=False).reset_index(drop=True)
+        r = load_csv_sorted("current_team_ratings.csv", "rating", ascending=False).reset_index(drop=True)
         r.index += 1
         r.columns = ["Team", "Rating", "Matches", "Wins", "Losses"]
-        r["Win %"] = (r["Wins"] / r["Matches"] * 100).round(1)
+        r["Win %"] = (r["Wins"] / r["Matches"] * 100).astype(float).round(1)
         r["Rating"] = r["Rating"].round(0).astype(int)
         st.dataframe(r, use_container_width=True)
 
@@ -262,12 +297,17 @@ def page_calibration():
     st.markdown("How well the statistical bucket model's predicted probabilities match actual outcomes. "
                 "A perfectly calibrated model falls on the diagonal line.")
 
-    cal = data["calibration"]
-    backtest = data["backtest"]
+    cal = load_csv("live_model_calibration_2020_plus.csv")
+    backtest = load_csv("rolling_backtest_results.csv")
 
     tab1, tab2 = st.tabs(["Calibration Plot", "Rolling Backtest"])
 
     with tab1:
+        hover_text = ("Decile " + cal["decile"].astype(str)
+                      + "<br>Pred: " + cal["avg_predicted_prob"].astype(float).map("{:.3f}".format)
+                      + "<br>Actual: " + cal["actual_win_rate"].astype(float).map("{:.3f}".format)
+                      + "<br>n=" + cal["sample_count"].astype(int).astype(str)).to_numpy()
+
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=[0, 1], y=[0, 1], mode="lines", name="Perfect Calibration",
@@ -277,10 +317,7 @@ def page_calibration():
             x=cal["avg_predicted_prob"], y=cal["actual_win_rate"],
             mode="markers+lines", name="Model",
             marker=dict(size=cal["sample_count"] / cal["sample_count"].max() * 30 + 5, color="#1f77b4"),
-            text=cal.apply(lambda r: f"Decile {r['decile']}<br>"
-                                     f"Pred: {r['avg_predicted_prob']:.3f}<br>"
-                                     f"Actual: {r['actual_win_rate']:.3f}<br>"
-                                     f"n={int(r['sample_count'])}", axis=1),
+            text=hover_text,
             hoverinfo="text",
         ))
         fig.update_layout(
@@ -298,8 +335,7 @@ def page_calibration():
 
     with tab2:
         st.subheader("Rolling Window Backtest Results")
-        bt = backtest.copy()
-        bt["test_year"] = bt["test_year"].astype(str)
+        bt = backtest.astype({"test_year": str})
 
         fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
                             subplot_titles=["Brier Score by Test Year", "Accuracy by Test Year"],
@@ -320,36 +356,38 @@ def page_calibration():
         )
 
 
+@st.cache_resource(show_spinner=False)
+def build_pre_match_edge(odds_name, elo_name):
+    odds = load_csv(odds_name)
+    elo = load_csv(elo_name)
+    merged = odds.merge(
+        elo[["match_id", "expected_win_probability_team_1"]],
+        on="match_id", how="left"
+    )
+    has_odds = merged.dropna(subset=["team_1_market_prob", "expected_win_probability_team_1"]).assign(
+        model_prob_1=lambda d: d["expected_win_probability_team_1"].astype(float),
+        market_prob_1=lambda d: d["team_1_market_prob"].astype(float),
+        edge_1=lambda d: d["model_prob_1"] - d["market_prob_1"],
+    )
+    return has_odds.sort_values("date", ascending=False)
+
+
 def page_pre_match_edge():
     st.title("Pre-Match Edge Analysis")
     st.markdown("Compares model predictions against Pinnacle closing odds to identify pre-match "
                 "value opportunities. Edge = Model Probability - Market Probability.")
 
-    odds = data["odds_matches"]
-    elo = data["elo_history"]
-    edge_sim = data["edge_pre"]
+    edge_sim = load_csv("edge_simulation_results.csv")
 
-    merged = odds.merge(
-        elo[["match_id", "expected_win_probability_team_1"]],
-        on="match_id", how="left"
-    )
-    has_odds = merged.dropna(subset=["team_1_market_prob", "expected_win_probability_team_1"]).copy()
+    has_odds = build_pre_match_edge("match_metadata_with_odds.csv", "elo_ratings_history.csv")
     if len(has_odds) == 0:
         st.warning("No matches with bookmaker odds data available.")
         return
 
-    has_odds["model_prob_1"] = has_odds["expected_win_probability_team_1"].astype(float)
-    has_odds["market_prob_1"] = has_odds["team_1_market_prob"].astype(float)
-    has_odds["edge_1"] = has_odds["model_prob_1"] - has_odds["market_prob_1"]
-
     tab1, tab2, tab3 = st.tabs(["Edge Distribution", "Simulation Results", "Match Details"])
 
     with tab1:
-        fig = px.histogram(
-            has_odds, x="edge_1", nbins=50,
-            labels={"edge_1": "Edge (Model - Market)"},
-            color_discrete_sequence=["#1f77b4"],
-        )
+        fig = binned_histogram(has_odds["edge_1"], 50, "Edge (Model - Market)", "#1f77b4")
         fig.add_vline(x=0, line_dash="dash", line_color="red")
         fig.update_layout(height=400, margin=dict(l=0, r=0, t=10, b=0))
         st.plotly_chart(fig, use_container_width=True)
@@ -361,15 +399,17 @@ def page_pre_match_edge():
 
     with tab2:
         st.subheader("Flat-Stake Simulation by Edge Threshold")
-        sim = edge_sim.copy()
+        sim = edge_sim
+
+        threshold_labels = sim["threshold"].astype(float).map("{:.0%}".format)
 
         fig = make_subplots(rows=1, cols=2, subplot_titles=["ROI % by Threshold", "Win Rate by Threshold"])
-        fig.add_trace(go.Bar(x=sim["threshold"].apply(lambda x: f"{float(x):.0%}"),
+        fig.add_trace(go.Bar(x=threshold_labels,
                              y=sim["roi_pct"], name="ROI %",
                              marker_color=sim["roi_pct"].apply(
                                  lambda x: "#2ca02c" if x > 0 else "#d62728")),
                       row=1, col=1)
-        fig.add_trace(go.Bar(x=sim["threshold"].apply(lambda x: f"{float(x):.0%}"),
+        fig.add_trace(go.Bar(x=threshold_labels,
                              y=sim["win_rate"].apply(lambda x: float(x) * 100),
                              name="Win Rate %", marker_color="#1f77b4"),
                       row=1, col=2)
@@ -388,7 +428,7 @@ def page_pre_match_edge():
     with tab3:
         st.subheader("Recent Matches with Edge")
         min_edge = st.slider("Minimum edge filter", -0.3, 0.3, 0.0, 0.01)
-        filtered = has_odds[has_odds["edge_1"] >= min_edge].sort_values("date", ascending=False)
+        filtered = has_odds[has_odds["edge_1"] >= min_edge]
 
         display_cols = {
             "date": "Date", "team_1": "Team 1", "team_2": "Team 2",
@@ -396,10 +436,26 @@ def page_pre_match_edge():
             "edge_1": "Edge", "winner": "Winner",
         }
         show = filtered[list(display_cols.keys())].rename(columns=display_cols).head(50)
-        show["Model %"] = show["Model %"].apply(lambda x: f"{x:.1%}")
-        show["Market %"] = show["Market %"].apply(lambda x: f"{x:.1%}")
-        show["Edge"] = show["Edge"].apply(lambda x: f"{x:+.1%}")
-        st.dataframe(show, use_container_width=True, hide_index=True)
+        show[["Model %", "Market %", "Edge"]] *= 100
+        st.dataframe(
+            show,
+            column_config={"Model %": PERCENT_COLUMN, "Market %": PERCENT_COLUMN,
+                           "Edge": SIGNED_PERCENT_COLUMN},
+            use_container_width=True, hide_index=True,
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def build_inplay_phases(name):
+    high_conf = load_csv_safe(name)
+    hc = high_conf.assign(
+        over=high_conf["over_number"].astype(int),
+        model_prob=high_conf["final_stabilized_probability"].astype(float),
+        won=high_conf["batting_team"].to_numpy() == high_conf["eventual_winner"].to_numpy(),
+    )
+    hc["phase"] = pd.cut(hc["over"].to_numpy(), bins=[-np.inf, 6, 15, np.inf],
+                         labels=["Powerplay (1-6)", "Middle (7-15)", "Death (16-20)"])
+    return hc
 
 
 def page_inplay_edge():
@@ -407,9 +463,9 @@ def page_inplay_edge():
     st.markdown("High-confidence (85%+) model predictions analyzed against in-play market odds. "
                 "These represent game states where the model is highly confident in the batting team winning.")
 
-    inplay = data["inplay"]
-    edge_live = data["edge_live"]
-    high_conf = data["high_conf"]
+    inplay = load_csv_safe("high_confidence_inplay_odds.csv")
+    edge_live = load_csv_safe("live_edge_simulation_results.csv")
+    high_conf = load_csv_safe("high_confidence_snapshots_85_plus.csv")
 
     has_inplay_odds = len(inplay) > 0 and "edge" in inplay.columns
 
@@ -420,11 +476,7 @@ def page_inplay_edge():
 
     with tab1:
         if has_inplay_odds:
-            fig = px.histogram(
-                inplay, x="edge", nbins=40,
-                labels={"edge": "Edge (Model - Market)"},
-                color_discrete_sequence=["#2ca02c"],
-            )
+            fig = binned_histogram(inplay["edge"], 40, "Edge (Model - Market)", "#2ca02c")
             fig.update_layout(height=400, margin=dict(l=0, r=0, t=10, b=0))
             st.plotly_chart(fig, use_container_width=True)
 
@@ -445,35 +497,25 @@ def page_inplay_edge():
             c4.metric("Actual Win Rate", f"{win_rate:.1%}")
 
             st.subheader("Model Probability Distribution")
-            fig = px.histogram(
-                high_conf, x="final_stabilized_probability", nbins=30,
-                labels={"final_stabilized_probability": "Model Probability"},
-                color_discrete_sequence=["#2ca02c"],
-            )
+            fig = binned_histogram(high_conf["final_stabilized_probability"], 30, "Model Probability", "#2ca02c")
             fig.update_layout(height=350, margin=dict(l=0, r=0, t=10, b=0))
             st.plotly_chart(fig, use_container_width=True)
 
             st.subheader("By Innings Phase")
-            hc = high_conf.copy()
-            hc["over"] = hc["over_number"].astype(int)
-            hc["phase"] = hc["over"].apply(
-                lambda o: "Powerplay (1-6)" if o <= 6 else ("Middle (7-15)" if o <= 15 else "Death (16-20)")
-            )
-            phase_stats = hc.groupby("phase").agg(
-                count=("final_stabilized_probability", "size"),
-                avg_prob=("final_stabilized_probability", lambda x: x.astype(float).mean()),
-                win_rate=("eventual_winner",
-                          lambda x: (hc.loc[x.index, "batting_team"] == x).mean()),
+            hc = build_inplay_phases("high_confidence_snapshots_85_plus.csv")
+            phase_stats = hc.groupby("phase", observed=True).agg(
+                count=("won", "size"),
+                avg_prob=("model_prob", "mean"),
+                win_rate=("won", "mean"),
             ).reset_index()
             phase_stats.columns = ["Phase", "Snapshots", "Avg Model Prob", "Actual Win Rate"]
             st.dataframe(phase_stats, use_container_width=True, hide_index=True)
 
             st.subheader("By Innings")
             inn_stats = hc.groupby("innings_number").agg(
-                count=("final_stabilized_probability", "size"),
-                avg_prob=("final_stabilized_probability", lambda x: x.astype(float).mean()),
-                win_rate=("eventual_winner",
-                          lambda x: (hc.loc[x.index, "batting_team"] == x).mean()),
+                count=("won", "size"),
+                avg_prob=("model_prob", "mean"),
+                win_rate=("won", "mean"),
             ).reset_index()
             inn_stats.columns = ["Innings", "Snapshots", "Avg Model Prob", "Actual Win Rate"]
             st.dataframe(inn_stats, use_container_width=True, hide_index=True)
@@ -483,7 +525,7 @@ def page_inplay_edge():
     with tab2:
         if has_inplay_odds:
             st.subheader("In-Play Flat-Stake Simulation (1 trade per match)")
-            sim = edge_live.copy()
+            sim = edge_live
             st.dataframe(
                 sim.rename(columns={
                     "threshold": "Threshold", "total_trades": "Trades", "wins": "Wins",
@@ -528,8 +570,8 @@ def page_inplay_edge():
     if has_inplay_odds:
         with tab3:
             st.subheader("In-Play Trade Log")
-            ip = inplay.sort_values(["date", "innings_number", "over_number"],
-                                    ascending=[False, True, True])
+            ip = load_csv_sorted("high_confidence_inplay_odds.csv", ["date", "innings_number", "over_number"],
+                                 ascending=[False, True, True])
             cols = ["date", "batting_team", "bowling_team", "innings_number",
                     "over_number", "model_probability", "market_prob_1",
                     "edge", "market_odds_1", "eventual_winner"]
@@ -538,14 +580,37 @@ def page_inplay_edge():
             if "bookmaker_used" in ip.columns:
                 cols.append("bookmaker_used")
                 col_names.append("Source")
-            display = ip[cols].copy()
-            display.columns = col_names
-            display["Model %"] = display["Model %"].astype(float).apply(lambda x: f"{x:.1%}")
-            display["Market %"] = display["Market %"].astype(float).apply(lambda x: f"{x:.1%}")
-            display["Edge"] = display["Edge"].astype(float).apply(lambda x: f"{x:+.1%}")
+            display = ip[cols].set_axis(col_names, axis=1)
+            pct_cols = ["Model %", "Market %", "Edge"]
+            display[pct_cols] = display[pct_cols].astype(float) * 100
             display["Won"] = ip["batting_team"].values == ip["eventual_winner"].values
             display["Won"] = display["Won"].map({True: "Yes", False: "No"})
-            st.dataframe(display, use_container_width=True, hide_index=True)
+            st.dataframe(
+                display,
+                column_config={"Model %": PERCENT_COLUMN, "Market %": PERCENT_COLUMN,
+                               "Edge": SIGNED_PERCENT_COLUMN},
+                use_container_width=True, hide_index=True,
+            )
+
+
+BUCKET_KEYS = ["over_bucket", "wickets_bucket", "run_pressure_bucket", "elo_diff_bucket"]
+
+
+@st.cache_resource(show_spinner=False)
+def build_bucket_options(name):
+    bm = load_csv(name)
+    return tuple(sorted(bm[col].unique()) for col in BUCKET_KEYS)
+
+
+@st.cache_resource(show_spinner=False)
+def build_bucket_index(name):
+    return load_csv(name).set_index(BUCKET_KEYS).sort_index()
+
+
+@st.cache_resource(show_spinner=False)
+def build_bucket_heatmap(name):
+    bm = load_csv(name)
+    return bm.groupby(["over_bucket", "elo_diff_bucket"], observed=True)["final_stabilized_probability"].mean().unstack()
 
 
 def page_bucket_model():
@@ -553,31 +618,29 @@ def page_bucket_model():
     st.markdown("Win probability predictions based on game state buckets: over phase, wickets lost, "
                 "run pressure, and Elo differential. Hierarchical stabilization with 5 fallback levels.")
 
-    bm = data["bucket_model"]
+    bucket_model_csv = "statistical_bucket_model_stabilized.csv"
+    bm = load_csv(bucket_model_csv)
 
     tab1, tab2 = st.tabs(["Model Explorer", "Sample Distribution"])
 
     with tab1:
         c1, c2, c3, c4 = st.columns(4)
-        over_opts = sorted(bm["over_bucket"].unique())
-        wicket_opts = sorted(bm["wickets_bucket"].unique())
-        pressure_opts = sorted(bm["run_pressure_bucket"].unique())
-        elo_opts = sorted(bm["elo_diff_bucket"].unique())
+        over_opts, wicket_opts, pressure_opts, elo_opts = build_bucket_options(bucket_model_csv)
 
         sel_over = c1.selectbox("Over Phase", over_opts)
         sel_wickets = c2.selectbox("Wickets", wicket_opts)
         sel_pressure = c3.selectbox("Run Pressure", pressure_opts)
         sel_elo = c4.selectbox("Elo Differential", elo_opts)
 
-        filtered = bm[
-            (bm["over_bucket"] == sel_over) &
-            (bm["wickets_bucket"] == sel_wickets) &
-            (bm["run_pressure_bucket"] == sel_pressure) &
-            (bm["elo_diff_bucket"] == sel_elo)
-        ]
+        bm_idx = build_bucket_index(bucket_model_csv)
+        try:
+            row = bm_idx.loc[(sel_over, sel_wickets, sel_pressure, sel_elo)]
+            if isinstance(row, pd.DataFrame):
+                row = row.iloc[0]
+        except KeyError:
+            row = None
 
-        if len(filtered) > 0:
-            row = filtered.iloc[0]
+        if row is not None:
             mc1, mc2, mc3, mc4 = st.columns(4)
             mc1.metric("Win Probability", f"{row['final_stabilized_probability']:.1%}")
             mc2.metric("Sample Size", f"{int(row['sample_size']):,}")
@@ -591,9 +654,7 @@ def page_bucket_model():
 
     with tab2:
         st.subheader("Sample Size Distribution")
-        fig = px.histogram(bm, x="sample_size", nbins=50,
-                           labels={"sample_size": "Sample Size"},
-                           color_discrete_sequence=["#1f77b4"])
+        fig = binned_histogram(bm["sample_size"], 50, "Sample Size", "#1f77b4")
         fig.update_layout(height=350, margin=dict(l=0, r=0, t=10, b=0))
         st.plotly_chart(fig, use_container_width=True)
 
@@ -604,7 +665,7 @@ def page_bucket_model():
                   ", ".join(f"L{int(k)}:{int(v)}" for k, v in bm["fallback_level"].value_counts().sort_index().items()))
 
         st.subheader("Win Probability by Over Phase and Elo")
-        heatmap = bm.groupby(["over_bucket", "elo_diff_bucket"])["final_stabilized_probability"].mean().unstack()
+        heatmap = build_bucket_heatmap(bucket_model_csv)
         fig2 = px.imshow(
             heatmap, text_auto=".1%", color_continuous_scale="RdYlGn",
             labels={"x": "Elo Differential", "y": "Over Phase", "color": "Win Prob"},
@@ -619,9 +680,9 @@ def page_edge_audit():
     st.markdown("Institutional-grade analysis of in-play edge claims. Tests timestamp integrity, "
                 "applies real-world friction (commission, slippage, execution delay), and identifies leakage risks.")
 
-    audit = data["timestamp_audit"]
-    realistic = data["realistic_sim"]
-    edge_live = data["edge_live"]
+    audit = load_csv_safe("timestamp_audit_results.csv")
+    realistic = load_csv_safe("realistic_edge_simulation_results.csv")
+    edge_live = load_csv_safe("live_edge_simulation_results.csv")
 
     if len(audit) == 0 and len(realistic) == 0:
         st.warning("Audit data not yet generated. Run build_timestamp_audit.py and build_realistic_simulation.py first.")
@@ -655,11 +716,8 @@ def page_edge_audit():
                 f"the edge calculation is systematically biased for later overs."
             )
 
-            fig_delta = px.histogram(
-                audit, x="timestamp_vs_over_delta_minutes", nbins=50,
-                labels={"timestamp_vs_over_delta_minutes": "Fetch TS - Over End (minutes)"},
-                color_discrete_sequence=["#d62728"],
-            )
+            fig_delta = binned_histogram(audit["timestamp_vs_over_delta_minutes"], 50,
+                                         "Fetch TS - Over End (minutes)", "#d62728")
             fig_delta.add_vline(x=0, line_dash="dash", line_color="black",
                                 annotation_text="Over End")
             fig_delta.update_layout(height=350, margin=dict(l=0, r=0, t=10, b=0))
@@ -702,11 +760,11 @@ def page_edge_audit():
             for scenario_label, scenario_key in [("Gross (No Friction)", "gross"),
                                                    ("Realistic (5% comm + 1 tick)", "realistic"),
                                                    ("Worst Case (7.5% comm + 2 ticks)", "worst_case")]:
-                sc = realistic[realistic["scenario"] == scenario_key].copy()
+                sc = realistic[realistic["scenario"] == scenario_key]
                 if len(sc) == 0:
                     continue
                 st.markdown(f"**{scenario_label}**")
-                sc["threshold"] = sc["threshold"].astype(float).apply(lambda x: f"{x:.0%}")
+                sc = sc.assign(threshold=sc["threshold"].astype(float) * 100)
                 display_cols = {
                     "threshold": "Threshold", "total_trades": "Trades",
                     "wins": "Wins", "win_rate": "Win Rate",
@@ -717,13 +775,14 @@ def page_edge_audit():
                 available_cols = {k: v for k, v in display_cols.items() if k in sc.columns}
                 st.dataframe(
                     sc[list(available_cols.keys())].rename(columns=available_cols),
+                    column_config={"Threshold": THRESHOLD_COLUMN},
                     use_container_width=True, hide_index=True,
                 )
 
             st.divider()
             st.subheader("ROI Comparison Across Scenarios")
-            chart_data = realistic[["threshold", "scenario", "roi_pct"]].copy()
-            chart_data["threshold"] = chart_data["threshold"].astype(float).apply(lambda x: f"{x:.0%}")
+            chart_data = realistic[["threshold", "scenario", "roi_pct"]].assign(
+                threshold=realistic["threshold"].astype(float).map("{:.0%}".format))
             fig_comp = px.bar(
                 chart_data, x="threshold", y="roi_pct", color="scenario",
                 barmode="group",
@@ -787,6 +846,7 @@ to ALL overs in that innings — meaning over 4 and over 18 use identical odds,
                 labels={"timestamp_vs_over_delta_minutes": "Timestamp Delta (min)",
                         "edge": "Edge", "leakage_risk": "Risk"},
                 opacity=0.6,
+                render_mode="webgl" if len(audit) > WEBGL_MIN_POINTS else "svg",
             )
             fig_scatter.add_vline(x=0, line_dash="dash", line_color="black")
             fig_scatter.update_layout(height=400, margin=dict(l=0, r=0, t=10, b=0))
@@ -1,6 +1,10 @@
 import csv
+import multiprocessing
 import os
 
+import numpy as np
+import pandas as pd
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 OLD_INPUT_PATH = os.path.join(PROCESSED_DIR, "high_confidence_inplay_odds.csv")
@@ -14,6 +18,13 @@ SLIPPAGE_TICKS = 1
 TICK_SIZE = 0.02
 EXECUTION_DELAY_PENALTY = 0.01
 
+PARALLEL_MIN_ROWS = 100_000
+
+INPUT_COLUMNS = ["match_id", "date", "innings_number", "over_number", "batting_team",
+                 "eventual_winner", "market_odds_1", "market_prob_1", "edge"]
+INPUT_DTYPES = {"match_id": str, "date": str, "batting_team": str, "eventual_winner": str}
+SORT_COLUMNS = ["date", "match_id", "innings_number", "over_number"]
+
 OUTPUT_FIELDS = [
     "data_source", "threshold", "scenario",
     "total_trades", "wins", "losses", "win_rate",
@@ -26,92 +37,62 @@ OUTPUT_FIELDS = [
 
 
 def apply_slippage(odds, ticks):
-    return max(1.01, odds - ticks * TICK_SIZE)
+    return np.maximum(1.01, odds - ticks * TICK_SIZE)
 
 
 def apply_commission(profit, rate):
-    if profit > 0:
-        return profit * (1.0 - rate)
-    return profit
-
-
-def run_simulation(rows, threshold, scenario="gross", first_only=True):
-    seen_matches = set()
-    trades = []
-    bankroll_history = [0.0]
-    peak = 0.0
-    max_drawdown = 0.0
-    total_commission = 0.0
-    total_slippage = 0.0
-    edge_sum = 0.0
-    market_prob_sum = 0.0
-
-    for row in rows:
-        mid = row["match_id"]
-        edge = float(row["edge"])
-        model_prob = float(row["model_probability"])
-        raw_odds = float(row["market_odds_1"])
-        market_prob = float(row["market_prob_1"])
-        batting_team = row["batting_team"]
-        winner = row["eventual_winner"]
-
-        effective_edge = edge
-        if scenario in ("realistic", "worst_case"):
-            effective_edge -= EXECUTION_DELAY_PENALTY
-
-        if effective_edge < threshold:
-            continue
-
-        if first_only and mid in seen_matches:
-            continue
-        seen_matches.add(mid)
-
-        won = (batting_team == winner)
-
-        if scenario == "gross":
-            effective_odds = raw_odds
-            pnl = (effective_odds - 1.0) if won else -1.0
-            commission = 0.0
-            slippage = 0.0
-        elif scenario == "realistic":
-            effective_odds = apply_slippage(raw_odds, SLIPPAGE_TICKS)
-            gross_pnl = (effective_odds - 1.0) if won else -1.0
-            pnl = apply_commission(gross_pnl, COMMISSION_RATE)
-            commission = gross_pnl - pnl if gross_pnl > 0 else 0
-            slippage = raw_odds - effective_odds
-        elif scenario == "worst_case":
-            effective_odds = apply_slippage(raw_odds, SLIPPAGE_TICKS * 2)
-            gross_pnl = (effective_odds - 1.0) if won else -1.0
-            pnl = apply_commission(gross_pnl, COMMISSION_RATE * 1.5)
-            commission = gross_pnl - pnl if gross_pnl > 0 else 0
-            slippage = raw_odds - effective_odds
-        else:
-            effective_odds = raw_odds
-            pnl = (effective_odds - 1.0) if won else -1.0
-            commission = 0.0
-            slippage = 0.0
-
-        total_commission += commission
-        total_slippage += slippage
-        edge_sum += edge
-        market_prob_sum += market_prob
-
-        trades.append({
-            "match_id": mid,
-            "won": won,
-            "pnl": pnl,
-            "odds": raw_odds,
-            "effective_odds": effective_odds,
-            "commission": commission,
-        })
-
-        cumulative = bankroll_history[-1] + pnl
-        bankroll_history.append(cumulative)
-        peak = max(peak, cumulative)
-        dd = peak - cumulative
-        max_drawdown = max(max_drawdown, dd)
-
-    total = len(trades)
+    return np.where(profit > 0, profit * (1.0 - rate), profit)
+
+
+def load_sorted(path):
+    df = pd.read_csv(path, usecols=INPUT_COLUMNS, dtype=INPUT_DTYPES, float_precision="round_trip")
+    return df.sort_values(SORT_COLUMNS, ignore_index=True)
+
+
+def build_scenario_arrays(raw_odds, won, ticks, commission_rate):
+    effective_odds = apply_slippage(raw_odds, ticks) if ticks else raw_odds
+    gross_pnl = np.where(won, effective_odds - 1.0, -1.0)
+    pnl = apply_commission(gross_pnl, commission_rate)
+    return {
+        "effective_odds": effective_odds,
+        "pnl": pnl,
+        "commission": np.where(gross_pnl > 0, gross_pnl - pnl, 0.0),
+        "slippage": raw_odds - effective_odds,
+    }
+
+
+def build_source_arrays(df):
+    raw_odds = df["market_odds_1"].to_numpy(dtype=float)
+    edge = df["edge"].to_numpy(dtype=float)
+    won = df["batting_team"].to_numpy() == df["eventual_winner"].to_numpy()
+    return {
+        "match_code": pd.factorize(df["match_id"])[0].astype(np.int32),
+        "edge": edge,
+        "delayed_edge": edge - EXECUTION_DELAY_PENALTY,
+        "market_prob": df["market_prob_1"].to_numpy(dtype=float),
+        "won": won,
+        "scenarios": {
+            "gross": build_scenario_arrays(raw_odds, won, 0, 0.0),
+            "realistic": build_scenario_arrays(raw_odds, won, SLIPPAGE_TICKS, COMMISSION_RATE),
+            "worst_case": build_scenario_arrays(raw_odds, won, SLIPPAGE_TICKS * 2,
+                                                COMMISSION_RATE * 1.5),
+        },
+    }
+
+
+def run_simulation(source, threshold, scenario="gross", first_only=True):
+    edge = source["edge"]
+
+    effective_edge = edge
+    if scenario in ("realistic", "worst_case"):
+        effective_edge = source["delayed_edge"]
+
+    idx = np.flatnonzero(effective_edge >= threshold)
+    if first_only:
+        _, first = np.unique(source["match_code"][idx], return_index=True)
+        idx = idx[np.sort(first)]
+
+    total = len(idx)
     if total == 0:
         return {
             "threshold": threshold, "scenario": scenario,
@@ -123,17 +104,29 @@ def run_simulation(rows, threshold, scenario="gross", first_only=True):
             "total_commission": 0, "total_slippage_cost": 0,
         }
 
-    wins = sum(1 for t in trades if t["won"])
+    arrays = source["scenarios"][scenario]
+    effective_odds = arrays["effective_odds"][idx]
+    pnl = arrays["pnl"][idx]
+    won = source["won"][idx]
+
+    cumulative = np.cumsum(pnl)
+    peak = np.maximum(np.maximum.accumulate(cumulative), 0.0)
+    max_drawdown = float(max((peak - cumulative).max(), 0.0))
+
+    total_commission = float(arrays["commission"][idx].sum())
+    total_slippage = float(arrays["slippage"][idx].sum())
+
+    wins = int(won.sum())
     losses = total - wins
     total_staked = total
-    profit = round(sum(t["pnl"] for t in trades), 4)
+    profit = round(float(cumulative[-1]), 4)
     roi = round((profit / total_staked) * 100, 2) if total_staked > 0 else 0
     win_rate = round(wins / total, 4)
     max_dd_pct = round((max_drawdown / total_staked) * 100, 2) if total_staked > 0 else 0
-    avg_eff_odds = round(sum(t["effective_odds"] for t in trades) / total, 4)
+    avg_eff_odds = round(float(effective_odds.sum()) / total, 4)
     avg_comm = round(total_commission / total, 4) if total > 0 else 0
-    avg_edge = round(edge_sum / total, 4)
-    avg_mkt_prob = round(market_prob_sum / total, 4)
+    avg_edge = round(float(edge[idx].sum()) / total, 4)
+    avg_mkt_prob = round(float(source["market_prob"][idx].sum()) / total, 4)
 
     return {
         "threshold": threshold,
@@ -156,34 +149,46 @@ def run_simulation(rows, threshold, scenario="gross", first_only=True):
     }
 
 
+_sources = {}
+
+
+def init_worker(sources):
+    global _sources
+    _sources = sources
+
+
+def run_simulation_task(source_name, scenario, threshold):
+    result = run_simulation(_sources[source_name], threshold, scenario)
+    result["data_source"] = source_name
+    return result
+
+
 def main():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(OLD_INPUT_PATH, "r", encoding="utf-8") as f:
-        old_rows = list(csv.DictReader(f))
-    old_rows.sort(key=lambda r: (r["date"], r["match_id"],
-                                  int(r["innings_number"]), int(r["over_number"])))
-
-    with open(NEW_INPUT_PATH, "r", encoding="utf-8") as f:
-        new_rows = list(csv.DictReader(f))
-    new_rows.sort(key=lambda r: (r["date"], r["match_id"],
-                                  int(r["innings_number"]), int(r["over_number"])))
+    old_rows = load_sorted(OLD_INPUT_PATH)
+    new_rows = load_sorted(NEW_INPUT_PATH)
 
     print(f"\n=== build_corrected_simulation.py ===")
     print(f"  Old data (single-TS): {len(old_rows)} rows, "
-          f"{len(set(r['match_id'] for r in old_rows))} matches")
+          f"{old_rows['match_id'].nunique()} matches")
     print(f"  New data (per-over) : {len(new_rows)} rows, "
-          f"{len(set(r['match_id'] for r in new_rows))} matches")
+          f"{new_rows['match_id'].nunique()} matches")
 
     scenarios = ["gross", "realistic", "worst_case"]
-    results = []
-
-    for source_name, source_rows in [("single_timestamp", old_rows), ("per_over_aligned", new_rows)]:
-        for scenario in scenarios:
-            for threshold in THRESHOLDS:
-                result = run_simulation(source_rows, threshold, scenario)
-                result["data_source"] = source_name
-                results.append(result)
+    sources = {
+        "single_timestamp": build_source_arrays(old_rows),
+        "per_over_aligned": build_source_arrays(new_rows),
+    }
+    tasks = [(source_name, scenario, threshold)
+             for source_name in sources for scenario in scenarios for threshold in THRESHOLDS]
+
+    if len(old_rows) + len(new_rows) >= PARALLEL_MIN_ROWS:
+        with multiprocessing.Pool(initializer=init_worker, initargs=(sources,)) as pool:
+            results = pool.starmap(run_simulation_task, tasks)
+    else:
+        init_worker(sources)
+        results = [run_simulation_task(*task) for task in tasks]
 
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
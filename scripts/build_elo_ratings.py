@@ -3,6 +3,9 @@ import math
 import os
 import sys
 
+import numpy as np
+import pandas as pd
+
 
 INPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "match_metadata.csv")
 HISTORY_OUTPUT = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "elo_ratings_history.csv")
@@ -39,100 +42,108 @@ def load_matches(filepath):
     return matches
 
 
-def build_elo_ratings():
-    os.makedirs(os.path.dirname(HISTORY_OUTPUT), exist_ok=True)
-    matches = load_matches(INPUT_PATH)
-
-    ratings = {}
-    team_stats = {}
+def encode_teams(matches):
+    team_ids = {}
+    for match in matches:
+        team_ids.setdefault(match["team_1"], len(team_ids))
+        team_ids.setdefault(match["team_2"], len(team_ids))
+    return team_ids
 
-    history_rows = []
 
-    for match in matches:
-        team_1 = match["team_1"]
-        team_2 = match["team_2"]
-        winner = match["winner"]
+def elo_loop(team1_id, team2_id, winner_id, n_teams, k=K_FACTOR, init=INITIAL_RATING):
+    ratings = np.full(n_teams, float(init))
+    matches_played = np.zeros(n_teams, dtype=np.int32)
+    wins = np.zeros(n_teams, dtype=np.int32)
+    losses = np.zeros(n_teams, dtype=np.int32)
 
-        if team_1 not in ratings:
-            ratings[team_1] = INITIAL_RATING
-            team_stats[team_1] = {"matches_played": 0, "wins": 0, "losses": 0}
-        if team_2 not in ratings:
-            ratings[team_2] = INITIAL_RATING
-            team_stats[team_2] = {"matches_played": 0, "wins": 0, "losses": 0}
+    n = len(team1_id)
+    pre_r1 = np.empty(n)
+    pre_r2 = np.empty(n)
+    exp_1 = np.empty(n)
+    exp_2 = np.empty(n)
+    post_r1 = np.empty(n)
+    post_r2 = np.empty(n)
 
-        r1 = ratings[team_1]
-        r2 = ratings[team_2]
+    for i, (t1, t2, w) in enumerate(zip(team1_id.tolist(), team2_id.tolist(), winner_id.tolist())):
+        r1 = float(ratings[t1])
+        r2 = float(ratings[t2])
 
         e1 = expected_score(r1, r2)
         e2 = expected_score(r2, r1)
 
-        s1 = 1.0 if winner == team_1 else 0.0
-        s2 = 1.0 if winner == team_2 else 0.0
-
-        new_r1 = update_elo(r1, e1, s1)
-        new_r2 = update_elo(r2, e2, s2)
-
-        history_rows.append({
-            "match_id": match["match_id"],
-            "season": match["season"],
-            "date": match["date"],
-            "venue": match["venue"],
-            "team_1": team_1,
-            "team_2": team_2,
-            "pre_match_rating_team_1": r1,
-            "pre_match_rating_team_2": r2,
-            "rating_difference": round(r1 - r2, 2),
-            "expected_win_probability_team_1": round(e1, 4),
-            "expected_win_probability_team_2": round(e2, 4),
-            "winner": winner,
-            "post_match_rating_team_1": new_r1,
-            "post_match_rating_team_2": new_r2,
-        })
-
-        ratings[team_1] = new_r1
-        ratings[team_2] = new_r2
-
-        team_stats[team_1]["matches_played"] += 1
-        team_stats[team_2]["matches_played"] += 1
-        if winner == team_1:
-            team_stats[team_1]["wins"] += 1
-            team_stats[team_2]["losses"] += 1
+        new_r1 = update_elo(r1, e1, 1.0 if w == t1 else 0.0, k)
+        new_r2 = update_elo(r2, e2, 1.0 if w == t2 else 0.0, k)
+
+        pre_r1[i], pre_r2[i] = r1, r2
+        exp_1[i], exp_2[i] = e1, e2
+        post_r1[i], post_r2[i] = new_r1, new_r2
+
+        ratings[t1] = new_r1
+        ratings[t2] = new_r2
+
+        matches_played[t1] += 1
+        matches_played[t2] += 1
+        if w == t1:
+            wins[t1] += 1
+            losses[t2] += 1
         else:
-            team_stats[team_1]["losses"] += 1
-            team_stats[team_2]["wins"] += 1
-
-    with open(HISTORY_OUTPUT, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
-        writer.writeheader()
-        writer.writerows(history_rows)
-
-    current_rows = []
-    for team in sorted(ratings, key=lambda t: ratings[t], reverse=True):
-        current_rows.append({
-            "team": team,
-            "rating": ratings[team],
-            "matches_played": team_stats[team]["matches_played"],
-            "wins": team_stats[team]["wins"],
-            "losses": team_stats[team]["losses"],
-        })
-
-    with open(CURRENT_OUTPUT, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CURRENT_FIELDS)
-        writer.writeheader()
-        writer.writerows(current_rows)
+            losses[t1] += 1
+            wins[t2] += 1
+
+    return (pre_r1, pre_r2, exp_1, exp_2, post_r1, post_r2), (ratings, matches_played, wins, losses)
+
+
+def build_elo_ratings():
+    os.makedirs(os.path.dirname(HISTORY_OUTPUT), exist_ok=True)
+    matches = load_matches(INPUT_PATH)
+
+    team_ids = encode_teams(matches)
+    team1_id = np.fromiter((team_ids[m["team_1"]] for m in matches), dtype=np.int32, count=len(matches))
+    team2_id = np.fromiter((team_ids[m["team_2"]] for m in matches), dtype=np.int32, count=len(matches))
+    winner_id = np.fromiter((team_ids.get(m["winner"], -1) for m in matches), dtype=np.int32, count=len(matches))
+
+    (pre_r1, pre_r2, exp_1, exp_2, post_r1, post_r2), (final_ratings, matches_played, wins, losses) = \
+        elo_loop(team1_id, team2_id, winner_id, len(team_ids))
+
+    history = pd.DataFrame({
+        "match_id": [m["match_id"] for m in matches],
+        "season": [m["season"] for m in matches],
+        "date": [m["date"] for m in matches],
+        "venue": [m["venue"] for m in matches],
+        "team_1": [m["team_1"] for m in matches],
+        "team_2": [m["team_2"] for m in matches],
+        "pre_match_rating_team_1": pre_r1,
+        "pre_match_rating_team_2": pre_r2,
+        "rating_difference": np.round(pre_r1 - pre_r2, 2),
+        "expected_win_probability_team_1": np.round(exp_1, 4),
+        "expected_win_probability_team_2": np.round(exp_2, 4),
+        "winner": [m["winner"] for m in matches],
+        "post_match_rating_team_1": post_r1,
+        "post_match_rating_team_2": post_r2,
+    }, columns=HISTORY_FIELDS)
+    history.to_csv(HISTORY_OUTPUT, index=False, lineterminator="\r\n")
+
+    current = pd.DataFrame({
+        "team": list(team_ids),
+        "rating": final_ratings,
+        "matches_played": matches_played,
+        "wins": wins,
+        "losses": losses,
+    }, columns=CURRENT_FIELDS).sort_values("rating", ascending=False, kind="stable", ignore_index=True)
+    current.to_csv(CURRENT_OUTPUT, index=False, lineterminator="\r\n")
 
     print("\n=== build_elo_ratings.py Summary ===")
-    print(f"  Total matches processed    : {len(history_rows)}")
-    print(f"  Total teams tracked        : {len(ratings)}")
+    print(f"  Total matches processed    : {len(history)}")
+    print(f"  Total teams tracked        : {len(current)}")
     print(f"  K-factor                   : {K_FACTOR}")
     print(f"  Initial rating             : {INITIAL_RATING}")
     print(f"  History output             : {HISTORY_OUTPUT}")
     print(f"  Current ratings output     : {CURRENT_OUTPUT}")
     print(f"\n  Top 5 highest rated teams:")
-    for i, row in enumerate(current_rows[:5], 1):
-        print(f"    {i}. {row['team']:30s} — Rating: {row['rating']:.2f}  (W:{row['wins']} L:{row['losses']})")
+    for i, row in enumerate(current.head(5).itertuples(index=False), 1):
+        print(f"    {i}. {row.team:30s} — Rating: {row.rating:.2f}  (W:{row.wins} L:{row.losses})")
 
-    return history_rows, current_rows
+    return history, current
 
 
 if __name__ == "__main__":
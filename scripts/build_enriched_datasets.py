@@ -1,7 +1,9 @@
-import csv
 import os
 import sys
 
+import numpy as np
+import pandas as pd
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 
@@ -13,119 +15,57 @@ SNAPSHOTS_OUTPUT = os.path.join(PROCESSED_DIR, "over_state_snapshots_enriched.cs
 POWERPLAY_OUTPUT = os.path.join(PROCESSED_DIR, "powerplay_summary_enriched.csv")
 
 
+ELO_COLUMNS = ["batting_team_pre_elo", "bowling_team_pre_elo", "elo_rating_difference", "pre_match_expected_win_prob"]
+
+
 def load_csv(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
-
-
-def build_elo_lookup(elo_rows):
-    lookup = {}
-    for row in elo_rows:
-        mid = row["match_id"]
-        lookup[mid] = {
-            "team_1": row["team_1"],
-            "team_2": row["team_2"],
-            "pre_elo_1": float(row["pre_match_rating_team_1"]),
-            "pre_elo_2": float(row["pre_match_rating_team_2"]),
-            "exp_win_1": float(row["expected_win_probability_team_1"]),
-            "exp_win_2": float(row["expected_win_probability_team_2"]),
-        }
-    return lookup
-
-
-def get_elo_for_teams(elo_entry, batting_team, bowling_team):
-    if elo_entry["team_1"] == batting_team:
-        bat_elo = elo_entry["pre_elo_1"]
-        bowl_elo = elo_entry["pre_elo_2"]
-        bat_exp = elo_entry["exp_win_1"]
-    elif elo_entry["team_2"] == batting_team:
-        bat_elo = elo_entry["pre_elo_2"]
-        bowl_elo = elo_entry["pre_elo_1"]
-        bat_exp = elo_entry["exp_win_2"]
-    else:
-        return None
-    return {
-        "batting_team_pre_elo": bat_elo,
-        "bowling_team_pre_elo": bowl_elo,
-        "elo_rating_difference": round(bat_elo - bowl_elo, 2),
-        "pre_match_expected_win_prob": round(bat_exp, 4),
-    }
-
-
-def enrich_snapshots(snapshot_rows, elo_lookup):
-    enriched = []
-    null_count = 0
-    for row in snapshot_rows:
-        mid = row["match_id"]
-        elo_entry = elo_lookup.get(mid)
-        if elo_entry:
-            elo_data = get_elo_for_teams(elo_entry, row["batting_team"], row["bowling_team"])
-        else:
-            elo_data = None
-
-        if elo_data:
-            row.update(elo_data)
-        else:
-            null_count += 1
-            row["batting_team_pre_elo"] = ""
-            row["bowling_team_pre_elo"] = ""
-            row["elo_rating_difference"] = ""
-            row["pre_match_expected_win_prob"] = ""
-        enriched.append(row)
-    return enriched, null_count
-
-
-def enrich_powerplay(pp_rows, elo_lookup):
-    enriched = []
-    null_count = 0
-    for row in pp_rows:
-        mid = row["match_id"]
-        elo_entry = elo_lookup.get(mid)
-        if elo_entry:
-            elo_data = get_elo_for_teams(elo_entry, row["batting_team"], row["bowling_team"])
-        else:
-            elo_data = None
-
-        if elo_data:
-            row.update(elo_data)
-        else:
-            null_count += 1
-            row["batting_team_pre_elo"] = ""
-            row["bowling_team_pre_elo"] = ""
-            row["elo_rating_difference"] = ""
-            row["pre_match_expected_win_prob"] = ""
-        enriched.append(row)
-    return enriched, null_count
-
-
-def write_csv(filepath, rows, fieldnames):
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    return pd.read_csv(filepath, dtype=str, keep_default_na=False)
 
 
-def build_enriched_datasets():
-    elo_rows = load_csv(ELO_HISTORY_PATH)
-    elo_lookup = build_elo_lookup(elo_rows)
+def load_elo(filepath):
+    elo = pd.read_csv(filepath, dtype={"match_id": str, "team_1": str, "team_2": str}, usecols=[
+        "match_id", "team_1", "team_2",
+        "pre_match_rating_team_1", "pre_match_rating_team_2",
+        "expected_win_probability_team_1", "expected_win_probability_team_2",
+    ])
+    elo = elo.rename(columns={
+        "pre_match_rating_team_1": "pre_elo_1", "pre_match_rating_team_2": "pre_elo_2",
+        "expected_win_probability_team_1": "exp_win_1", "expected_win_probability_team_2": "exp_win_2",
+    })
+    return elo.drop_duplicates("match_id", keep="last")
+
 
-    snapshot_rows = load_csv(SNAPSHOTS_PATH)
-    enriched_snapshots, snap_nulls = enrich_snapshots(snapshot_rows, elo_lookup)
+def enrich_with_elo(rows, elo):
+    merged = rows[["match_id", "batting_team"]].merge(elo, on="match_id", how="left")
+    bat_is_1 = (merged["team_1"] == merged["batting_team"]).to_numpy()
+    bat_is_2 = (merged["team_2"] == merged["batting_team"]).to_numpy() & ~bat_is_1
+    matched = bat_is_1 | bat_is_2
 
-    snap_fields = list(snapshot_rows[0].keys())
-    for col in ["batting_team_pre_elo", "bowling_team_pre_elo", "elo_rating_difference", "pre_match_expected_win_prob"]:
-        if col not in snap_fields:
-            snap_fields.append(col)
-    write_csv(SNAPSHOTS_OUTPUT, enriched_snapshots, snap_fields)
+    bat_elo = np.where(bat_is_1, merged["pre_elo_1"], np.where(bat_is_2, merged["pre_elo_2"], np.nan))
+    bowl_elo = np.where(bat_is_1, merged["pre_elo_2"], np.where(bat_is_2, merged["pre_elo_1"], np.nan))
+    bat_exp = np.where(bat_is_1, merged["exp_win_1"], np.where(bat_is_2, merged["exp_win_2"], np.nan))
+
+    enriched = rows.drop(columns=ELO_COLUMNS, errors="ignore").assign(
+        batting_team_pre_elo=bat_elo,
+        bowling_team_pre_elo=bowl_elo,
+        elo_rating_difference=np.round(bat_elo - bowl_elo, 2),
+        pre_match_expected_win_prob=np.round(bat_exp, 4),
+    )
+    return enriched, int((~matched).sum())
+
+
+def write_csv(filepath, df):
+    df.to_csv(filepath, index=False, na_rep="", lineterminator="\r\n")
+
+
+def build_enriched_datasets():
+    elo = load_elo(ELO_HISTORY_PATH)
 
-    pp_rows = load_csv(POWERPLAY_PATH)
-    enriched_pp, pp_nulls = enrich_powerplay(pp_rows, elo_lookup)
+    enriched_snapshots, snap_nulls = enrich_with_elo(load_csv(SNAPSHOTS_PATH), elo)
+    write_csv(SNAPSHOTS_OUTPUT, enriched_snapshots)
 
-    pp_fields = list(pp_rows[0].keys())
-    for col in ["batting_team_pre_elo", "bowling_team_pre_elo", "elo_rating_difference", "pre_match_expected_win_prob"]:
-        if col not in pp_fields:
-            pp_fields.append(col)
-    write_csv(POWERPLAY_OUTPUT, enriched_pp, pp_fields)
+    enriched_pp, pp_nulls = enrich_with_elo(load_csv(POWERPLAY_PATH), elo)
+    write_csv(POWERPLAY_OUTPUT, enriched_pp)
 
     print("\n=== build_enriched_datasets.py Summary ===")
     print(f"\n  Over State Snapshots Enriched:")
@@ -133,20 +73,20 @@ def build_enriched_datasets():
     print(f"    Null Elo values     : {snap_nulls}")
     print(f"    Output              : {SNAPSHOTS_OUTPUT}")
     print(f"\n  Sample 5 rows (over_state_snapshots_enriched):")
-    for row in enriched_snapshots[:5]:
-        print(f"    match={row['match_id']} inn={row['innings_number']} over={row['over_number']} "
-              f"bat_elo={row['batting_team_pre_elo']} bowl_elo={row['bowling_team_pre_elo']} "
-              f"elo_diff={row['elo_rating_difference']} exp_win={row['pre_match_expected_win_prob']}")
+    for row in enriched_snapshots.head(5).itertuples(index=False):
+        print(f"    match={row.match_id} inn={row.innings_number} over={row.over_number} "
+              f"bat_elo={row.batting_team_pre_elo} bowl_elo={row.bowling_team_pre_elo} "
+              f"elo_diff={row.elo_rating_difference} exp_win={row.pre_match_expected_win_prob}")
 
     print(f"\n  Powerplay Summary Enriched:")
     print(f"    Total rows          : {len(enriched_pp)}")
     print(f"    Null Elo values     : {pp_nulls}")
     print(f"    Output              : {POWERPLAY_OUTPUT}")
     print(f"\n  Sample 5 rows (powerplay_summary_enriched):")
-    for row in enriched_pp[:5]:
-        print(f"    match={row['match_id']} bat={row['batting_team'][:20]:20s} "
-              f"bat_elo={row['batting_team_pre_elo']} bowl_elo={row['bowling_team_pre_elo']} "
-              f"elo_diff={row['elo_rating_difference']} exp_win={row['pre_match_expected_win_prob']}")
+    for row in enriched_pp.head(5).itertuples(index=False):
+        print(f"    match={row.match_id} bat={row.batting_team[:20]:20s} "
+              f"bat_elo={row.batting_team_pre_elo} bowl_elo={row.bowling_team_pre_elo} "
+              f"elo_diff={row.elo_rating_difference} exp_win={row.pre_match_expected_win_prob}")
 
     if snap_nulls == 0 and pp_nulls == 0:
         print(f"\n  CONFIRMED: No null Elo values in either enriched dataset.")
@@ -1,12 +1,22 @@
 import json
 import csv
+import multiprocessing
 import os
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw_json")
 OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "match_metadata.csv")
 
+CHUNKSIZE = 32
+
+INNINGS_MARKER = b',\n  "innings":'
+
 FIELDNAMES = [
     "match_id", "season", "date", "venue",
     "team_1", "team_2", "toss_winner", "toss_decision", "winner"
@@ -24,9 +34,22 @@ def normalize_team(name):
     return TEAM_NAME_MAP.get(name, name)
 
 
+def parse_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_json(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    cut = raw.find(INNINGS_MARKER)
+    if cut != -1:
+        try:
+            return parse_json(raw[:cut] + b"}")
+        except ValueError:
+            pass
+    return parse_json(raw)
 
 
 def is_valid_match(info):
@@ -41,56 +64,68 @@ def is_valid_match(info):
 def extract_metadata(match_id, data):
     info = data["info"]
     teams = info.get("teams", [])
-    return {
-        "match_id": match_id,
-        "season": str(info.get("season", "")),
-        "date": info.get("dates", [""])[0],
-        "venue": info.get("venue", ""),
-        "team_1": normalize_team(teams[0]) if len(teams) > 0 else "",
-        "team_2": normalize_team(teams[1]) if len(teams) > 1 else "",
-        "toss_winner": normalize_team(info.get("toss", {}).get("winner", "")),
-        "toss_decision": info.get("toss", {}).get("decision", ""),
-        "winner": normalize_team(info["outcome"]["winner"]),
-    }
+    return (
+        match_id,
+        str(info.get("season", "")),
+        info.get("dates", [""])[0],
+        info.get("venue", ""),
+        normalize_team(teams[0]) if len(teams) > 0 else "",
+        normalize_team(teams[1]) if len(teams) > 1 else "",
+        normalize_team(info.get("toss", {}).get("winner", "")),
+        info.get("toss", {}).get("decision", ""),
+        normalize_team(info["outcome"]["winner"]),
+    )
+
+
+def process_file(entry):
+    filename, filepath = entry
+    match_id = filename.replace(".json", "")
+    try:
+        data = load_json(filepath)
+        info = data["info"]
+        outcome = info.get("outcome", {})
+
+        if "winner" not in outcome:
+            return "no_winner", None
+        if "method" in outcome:
+            return "dls", None
+
+        return "ok", extract_metadata(match_id, data)
+    except Exception as e:
+        return "error", f"  Error processing {filename}: {e}"
 
 
 def build_metadata():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    json_files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith(".json")])
+    with os.scandir(DATA_DIR) as it:
+        json_files = sorted((e.name, e.path) for e in it if e.is_file() and e.name.endswith(".json"))
 
     rows = []
     skipped_no_winner = 0
     skipped_dls = 0
     errors = 0
 
-    for filename in json_files:
-        filepath = os.path.join(DATA_DIR, filename)
-        match_id = filename.replace(".json", "")
-        try:
-            data = load_json(filepath)
-            info = data["info"]
-            outcome = info.get("outcome", {})
-
-            if "winner" not in outcome:
+    with multiprocessing.Pool() as pool:
+        for status, result in pool.imap(process_file, json_files, chunksize=CHUNKSIZE):
+            if status == "ok":
+                rows.append(result)
+            elif status == "no_winner":
                 skipped_no_winner += 1
-                continue
-            if "method" in outcome:
+            elif status == "dls":
                 skipped_dls += 1
-                continue
-
-            row = extract_metadata(match_id, data)
-            rows.append(row)
-        except Exception as e:
-            errors += 1
-            print(f"  Error processing {filename}: {e}", file=sys.stderr)
+            else:
+                errors += 1
+                print(result, file=sys.stderr)
 
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
         writer.writerows(rows)
 
+    team_1_col = FIELDNAMES.index("team_1")
+    team_2_col = FIELDNAMES.index("team_2")
     unique_teams = sorted(set(
-        [r["team_1"] for r in rows] + [r["team_2"] for r in rows]
+        [r[team_1_col] for r in rows] + [r[team_2_col] for r in rows]
     ))
 
     print("\n=== build_metadata.py Summary ===")
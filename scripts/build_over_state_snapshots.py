@@ -1,12 +1,21 @@
 import json
 import csv
+import multiprocessing
 import os
 import sys
+from collections import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw_json")
 OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "over_state_snapshots.csv")
 
+CHUNKSIZE = 32
+
 FIELDNAMES = [
     "match_id", "season", "venue", "innings_number", "over_number",
     "batting_team", "bowling_team", "runs_so_far", "wickets_so_far",
@@ -27,6 +36,9 @@ def normalize_team(name):
 
 
 def load_json(filepath):
+    if orjson is not None:
+        with open(filepath, "rb") as f:
+            return orjson.loads(f.read())
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -40,26 +52,10 @@ def is_valid_match(info):
     return True
 
 
-def count_legal_deliveries(over_obj):
-    count = 0
-    for delivery in over_obj["deliveries"]:
-        extras = delivery.get("extras", {})
-        if "wides" not in extras and "noballs" not in extras:
-            count += 1
-    return count
-
-
-def get_innings_total_balls(innings_obj):
-    total = 0
-    for over_obj in innings_obj.get("overs", []):
-        total += count_legal_deliveries(over_obj)
-    return total
-
-
 def compute_over_snapshots(match_id, data):
     info = data["info"]
     innings_list = data.get("innings", [])
-    teams = info.get("teams", [])
+    teams = [normalize_team(t) for t in info.get("teams", [])]
     winner = normalize_team(info["outcome"]["winner"])
     season = str(info.get("season", ""))
     venue = info.get("venue", "")
@@ -75,8 +71,7 @@ def compute_over_snapshots(match_id, data):
     for innings_idx, innings_obj in enumerate(innings_list):
         innings_number = innings_idx + 1
         batting_team = normalize_team(innings_obj["team"])
-        bowling_team = [normalize_team(t) for t in teams if normalize_team(t) != batting_team]
-        bowling_team = bowling_team[0] if bowling_team else ""
+        bowling_team = next((t for t in teams if t != batting_team), "")
 
         cumulative_runs = 0
         cumulative_wickets = 0
@@ -86,12 +81,15 @@ def compute_over_snapshots(match_id, data):
             over_num = over_obj["over"]
             over_runs = 0
             over_wickets = 0
-            legal_balls = count_legal_deliveries(over_obj)
+            legal_balls = 0
 
             for delivery in over_obj["deliveries"]:
                 over_runs += delivery["runs"]["total"]
                 if "wickets" in delivery:
                     over_wickets += len(delivery["wickets"])
+                extras = delivery.get("extras")
+                if not extras or ("wides" not in extras and "noballs" not in extras):
+                    legal_balls += 1
 
             cumulative_runs += over_runs
             cumulative_wickets += over_wickets
@@ -112,21 +110,11 @@ def compute_over_snapshots(match_id, data):
                 balls_remaining = ""
                 rrr = ""
 
-            snapshots.append({
-                "match_id": match_id,
-                "season": season,
-                "venue": venue,
-                "innings_number": innings_number,
-                "over_number": completed_over,
-                "batting_team": batting_team,
-                "bowling_team": bowling_team,
-                "runs_so_far": cumulative_runs,
-                "wickets_so_far": cumulative_wickets,
-                "balls_remaining": balls_remaining,
-                "target": target,
-                "required_run_rate": rrr,
-                "eventual_winner": winner,
-            })
+            snapshots.append((
+                match_id, season, venue, innings_number, completed_over,
+                batting_team, bowling_team, cumulative_runs, cumulative_wickets,
+                balls_remaining, target, rrr, winner,
+            ))
 
         if innings_number == 1:
             first_innings_total = cumulative_runs
@@ -134,34 +122,43 @@ def compute_over_snapshots(match_id, data):
     return snapshots
 
 
+def process_file(entry):
+    filename, filepath = entry
+    match_id = filename.replace(".json", "")
+    try:
+        data = load_json(filepath)
+        info = data["info"]
+
+        if not is_valid_match(info):
+            return "skipped", None
+
+        return "ok", compute_over_snapshots(match_id, data)
+    except Exception as e:
+        return "error", f"  Error processing {filename}: {e}"
+
+
 def build_over_state_snapshots():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    json_files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith(".json")])
+    with os.scandir(DATA_DIR) as it:
+        json_files = sorted((e.name, e.path) for e in it if e.is_file() and e.name.endswith(".json"))
 
     all_rows = []
     skipped = 0
     errors = 0
 
-    for filename in json_files:
-        filepath = os.path.join(DATA_DIR, filename)
-        match_id = filename.replace(".json", "")
-        try:
-            data = load_json(filepath)
-            info = data["info"]
-
-            if not is_valid_match(info):
+    with multiprocessing.Pool() as pool:
+        for status, result in pool.imap(process_file, json_files, chunksize=CHUNKSIZE):
+            if status == "ok":
+                all_rows.extend(result)
+            elif status == "skipped":
                 skipped += 1
-                continue
-
-            snapshots = compute_over_snapshots(match_id, data)
-            all_rows.extend(snapshots)
-        except Exception as e:
-            errors += 1
-            print(f"  Error processing {filename}: {e}", file=sys.stderr)
+            else:
+                errors += 1
+                print(result, file=sys.stderr)
 
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
         writer.writerows(all_rows)
 
     print("\n=== build_over_state_snapshots.py Summary ===")
@@ -172,10 +169,10 @@ def build_over_state_snapshots():
     print(f"  Total snapshot rows saved   : {len(all_rows)}")
     print(f"  Output                      : {OUTPUT_PATH}")
     if all_rows:
-        innings_1 = [r for r in all_rows if r["innings_number"] == 1]
-        innings_2 = [r for r in all_rows if r["innings_number"] == 2]
-        print(f"  Innings 1 rows              : {len(innings_1)}")
-        print(f"  Innings 2 rows              : {len(innings_2)}")
+        innings_col = FIELDNAMES.index("innings_number")
+        innings_counts = Counter(r[innings_col] for r in all_rows)
+        print(f"  Innings 1 rows              : {innings_counts[1]}")
+        print(f"  Innings 2 rows              : {innings_counts[2]}")
 
     return all_rows
 
@@ -1,12 +1,24 @@
 import json
 import csv
+import multiprocessing
 import os
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw_json")
 OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "powerplay_summary.csv")
 
+CHUNKSIZE = 32
+
+INNINGS_MARKER = b',\n  "innings":'
+POWERPLAY_END_MARKER = b',\n        {\n          "over": 6,'
+INNINGS_SEPARATOR = b"\n    },\n    {"
+
 FIELDNAMES = [
     "match_id", "season", "venue", "batting_team", "bowling_team",
     "toss_winner", "toss_decision", "powerplay_runs", "powerplay_wickets",
@@ -22,13 +34,41 @@ TEAM_NAME_MAP = {
 }
 
 
-def normalize_team(name):
-    return TEAM_NAME_MAP.get(name, name)
+def parse_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def read_match(filepath):
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    return raw, raw.find(INNINGS_MARKER)
 
 
-def load_json(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+def load_info(raw, start):
+    if start != -1:
+        try:
+            return parse_json(raw[:start] + b"}")["info"]
+        except ValueError:
+            pass
+    return parse_json(raw)["info"]
+
+
+def load_innings(raw, start):
+    if start == -1:
+        return parse_json(raw).get("innings", [])
+    body = start + len(INNINGS_MARKER)
+    end = raw.find(INNINGS_SEPARATOR, start)
+    cut = raw.find(POWERPLAY_END_MARKER, start, end if end != -1 else len(raw))
+    try:
+        if cut != -1:
+            return parse_json(raw[body:cut] + b"\n      ]\n    }\n  ]")
+        if end != -1:
+            return parse_json(raw[body:end] + b"\n    }\n  ]")
+        return parse_json(raw[body:raw.rfind(b"}")])
+    except ValueError:
+        return parse_json(raw).get("innings", [])
 
 
 def is_valid_match(info):
@@ -54,9 +94,7 @@ def compute_powerplay(overs_data):
     return runs, wickets
 
 
-def extract_powerplay(match_id, data):
-    info = data["info"]
-    innings_list = data.get("innings", [])
+def extract_powerplay(match_id, info, innings_list):
     if not innings_list:
         return None
 
@@ -68,49 +106,68 @@ def extract_powerplay(match_id, data):
 
     pp_runs, pp_wickets = compute_powerplay(first_innings.get("overs", []))
 
-    return {
-        "match_id": match_id,
-        "season": str(info.get("season", "")),
-        "venue": info.get("venue", ""),
-        "batting_team": normalize_team(batting_team),
-        "bowling_team": normalize_team(bowling_team),
-        "toss_winner": normalize_team(info.get("toss", {}).get("winner", "")),
-        "toss_decision": info.get("toss", {}).get("decision", ""),
-        "powerplay_runs": pp_runs,
-        "powerplay_wickets": pp_wickets,
-        "final_winner": normalize_team(info["outcome"]["winner"]),
-    }
+    norm = TEAM_NAME_MAP.get
+    toss = info.get("toss", {})
+    toss_winner = toss.get("winner", "")
+    winner = info["outcome"]["winner"]
+    return (
+        match_id,
+        str(info.get("season", "")),
+        info.get("venue", ""),
+        norm(batting_team, batting_team),
+        norm(bowling_team, bowling_team),
+        norm(toss_winner, toss_winner),
+        toss.get("decision", ""),
+        pp_runs,
+        pp_wickets,
+        norm(winner, winner),
+    )
+
+
+def process_file(entry):
+    filename, filepath = entry
+    match_id = filename.replace(".json", "")
+    try:
+        raw, start = read_match(filepath)
+        info = load_info(raw, start)
+
+        if not is_valid_match(info):
+            return "skipped", None
+
+        return "ok", extract_powerplay(match_id, info, load_innings(raw, start))
+    except Exception as e:
+        return "error", f"  Error processing {filename}: {e}"
 
 
 def build_powerplay_summary():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    json_files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith(".json")])
+    with os.scandir(DATA_DIR) as it:
+        json_files = sorted((e.name, e.path) for e in it if e.is_file() and e.name.endswith(".json"))
 
     rows = []
     skipped = 0
     errors = 0
-
-    for filename in json_files:
-        filepath = os.path.join(DATA_DIR, filename)
-        match_id = filename.replace(".json", "")
-        try:
-            data = load_json(filepath)
-            info = data["info"]
-
-            if not is_valid_match(info):
+    runs_col = FIELDNAMES.index("powerplay_runs")
+    wickets_col = FIELDNAMES.index("powerplay_wickets")
+    runs_total = 0
+    wickets_total = 0
+
+    with multiprocessing.Pool() as pool:
+        for status, result in pool.imap(process_file, json_files, chunksize=CHUNKSIZE):
+            if status == "ok":
+                if result:
+                    rows.append(result)
+                    runs_total += result[runs_col]
+                    wickets_total += result[wickets_col]
+            elif status == "skipped":
                 skipped += 1
-                continue
-
-            row = extract_powerplay(match_id, data)
-            if row:
-                rows.append(row)
-        except Exception as e:
-            errors += 1
-            print(f"  Error processing {filename}: {e}", file=sys.stderr)
+            else:
+                errors += 1
+                print(result, file=sys.stderr)
 
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
         writer.writerows(rows)
 
     print("\n=== build_powerplay_summary.py Summary ===")
@@ -120,8 +177,8 @@ def build_powerplay_summary():
     print(f"  Errors                   : {errors}")
     print(f"  Output                   : {OUTPUT_PATH}")
     if rows:
-        avg_runs = sum(r["powerplay_runs"] for r in rows) / len(rows)
-        avg_wkts = sum(r["powerplay_wickets"] for r in rows) / len(rows)
+        avg_runs = runs_total / len(rows)
+        avg_wkts = wickets_total / len(rows)
         print(f"  Avg powerplay runs       : {avg_runs:.1f}")
         print(f"  Avg powerplay wickets    : {avg_wkts:.1f}")
 
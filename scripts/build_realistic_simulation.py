@@ -1,6 +1,7 @@
 import csv
 import os
 import math
+from operator import itemgetter
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -9,6 +10,9 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "realistic_edge_simulation_results.csv
 
 THRESHOLDS = [0.03, 0.05, 0.07, 0.10, 0.15]
 
+ROW_FIELDS = ("date", "match_id", "innings_number", "over_number",
+              "edge", "market_odds_1", "batting_team", "eventual_winner")
+
 COMMISSION_RATE = 0.05
 SLIPPAGE_TICKS = 1
 TICK_SIZE = 0.02
@@ -24,6 +28,14 @@ OUTPUT_FIELDS = [
 ]
 
 
+def read_columns(path, fields):
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        get = itemgetter(*(col[name] for name in fields))
+        return [get(row) for row in reader]
+
+
 def apply_slippage(odds, ticks):
     return max(1.01, odds - ticks * TICK_SIZE)
 
@@ -36,21 +48,16 @@ def apply_commission(profit, rate):
 
 def run_simulation(rows, threshold, scenario="gross"):
     seen_matches = set()
-    trades = []
-    bankroll_history = [0.0]
+    won_flags = []
+    pnls = []
+    effective_odds_paid = []
+    cumulative = 0.0
     peak = 0.0
     max_drawdown = 0.0
     total_commission = 0.0
     total_slippage = 0.0
 
-    for row in rows:
-        mid = row["match_id"]
-        edge = float(row["edge"])
-        model_prob = float(row["model_probability"])
-        raw_odds = float(row["market_odds_1"])
-        batting_team = row["batting_team"]
-        winner = row["eventual_winner"]
-
+    for _, mid, _, _, edge, raw_odds, batting_team, winner in rows:
         effective_edge = edge
         if scenario in ("realistic", "worst_case"):
             effective_edge -= EXECUTION_DELAY_PENALTY
@@ -90,22 +97,16 @@ def run_simulation(rows, threshold, scenario="gross"):
         total_commission += commission
         total_slippage += slippage
 
-        trades.append({
-            "match_id": mid,
-            "won": won,
-            "pnl": pnl,
-            "odds": raw_odds,
-            "effective_odds": effective_odds,
-            "commission": commission,
-        })
-
-        cumulative = bankroll_history[-1] + pnl
-        bankroll_history.append(cumulative)
+        won_flags.append(won)
+        pnls.append(pnl)
+        effective_odds_paid.append(effective_odds)
+
+        cumulative += pnl
         peak = max(peak, cumulative)
         dd = peak - cumulative
         max_drawdown = max(max_drawdown, dd)
 
-    total = len(trades)
+    total = len(pnls)
     if total == 0:
         return {
             "threshold": threshold, "scenario": scenario,
@@ -116,14 +117,14 @@ def run_simulation(rows, threshold, scenario="gross"):
             "total_commission": 0, "total_slippage_cost": 0,
         }
 
-    wins = sum(1 for t in trades if t["won"])
+    wins = sum(won_flags)
     losses = total - wins
     total_staked = total
-    profit = round(sum(t["pnl"] for t in trades), 4)
+    profit = round(sum(pnls), 4)
     roi = round((profit / total_staked) * 100, 2) if total_staked > 0 else 0
     win_rate = round(wins / total, 4)
     max_dd_pct = round((max_drawdown / total_staked) * 100, 2) if total_staked > 0 else 0
-    avg_eff_odds = round(sum(t["effective_odds"] for t in trades) / total, 4)
+    avg_eff_odds = round(sum(effective_odds_paid) / total, 4)
     avg_comm = round(total_commission / total, 4) if total > 0 else 0
 
     return {
@@ -148,15 +149,14 @@ def run_simulation(rows, threshold, scenario="gross"):
 def main():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
-
-    all_rows.sort(key=lambda r: (r["date"], r["match_id"],
-                                  int(r["innings_number"]), int(r["over_number"])))
+    all_rows = [(date, mid, int(inn), int(over), float(edge), float(odds), bat, winner)
+                for date, mid, inn, over, edge, odds, bat, winner
+                in read_columns(INPUT_PATH, ROW_FIELDS)]
+    all_rows.sort(key=itemgetter(0, 1, 2, 3))
 
     print(f"\n=== build_realistic_simulation.py ===")
     print(f"  Input rows: {len(all_rows)}")
-    print(f"  Unique matches: {len(set(r['match_id'] for r in all_rows))}")
+    print(f"  Unique matches: {len({r[1] for r in all_rows})}")
     print(f"\n  Friction parameters:")
     print(f"    Commission rate     : {COMMISSION_RATE:.0%}")
     print(f"    Slippage            : {SLIPPAGE_TICKS} tick(s) × {TICK_SIZE} = {SLIPPAGE_TICKS * TICK_SIZE:.2f}")
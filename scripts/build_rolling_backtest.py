@@ -1,7 +1,8 @@
 import csv
-import math
 import os
-from collections import defaultdict
+
+import numpy as np
+import pandas as pd
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -11,6 +12,23 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "rolling_backtest_results.csv")
 TRAIN_YEARS = 3
 MIN_SAMPLE = 50
 
+INPUT_COLUMNS = [
+    "match_id", "innings_number", "over_number", "runs_so_far", "wickets_so_far",
+    "required_run_rate", "batting_team", "eventual_winner", "elo_rating_difference",
+]
+BUCKET_COLUMNS = ["ob", "wb", "rpb", "edb"]
+
+OVER_LABELS = ["1-3", "4-6", "7-10", "11-15", "16-20"]
+WICKETS_LABELS = ["0-1", "2-3", "4-6", "7+"]
+PRESSURE_LABELS = ["first_innings", "very_low", "low", "neutral", "high", "very_high"]
+ELO_LABELS = ["strong_disadvantage", "moderate_disadvantage", "neutral",
+              "moderate_advantage", "strong_advantage"]
+TABLE_SHAPE = (len(OVER_LABELS), len(WICKETS_LABELS), len(PRESSURE_LABELS), len(ELO_LABELS))
+
+OVER_BINS = [3, 6, 10, 15]
+WICKETS_BINS = [1, 3, 6]
+PRESSURE_BINS = [-4, -1, 1, 4]
+
 OUTPUT_FIELDS = [
     "window", "train_start", "train_end", "test_year",
     "train_rows", "test_rows", "test_matches",
@@ -22,172 +40,122 @@ OUTPUT_FIELDS = [
 ]
 
 
-def get_year(date_str):
-    return int(date_str[:4])
-
-
 def over_bucket(over_num):
-    over_num = int(over_num)
-    if over_num <= 3:
-        return "1-3"
-    elif over_num <= 6:
-        return "4-6"
-    elif over_num <= 10:
-        return "7-10"
-    elif over_num <= 15:
-        return "11-15"
-    else:
-        return "16-20"
+    return np.searchsorted(OVER_BINS, over_num)
 
 
 def wickets_bucket(wickets):
-    wickets = int(wickets)
-    if wickets <= 1:
-        return "0-1"
-    elif wickets <= 3:
-        return "2-3"
-    elif wickets <= 6:
-        return "4-6"
-    else:
-        return "7+"
-
-
-def run_pressure_bucket(row):
-    innings = int(row["innings_number"])
-    if innings == 1:
-        return "first_innings"
-
-    over_num = row.get("over_number", "")
-    runs_so_far = row.get("runs_so_far", "")
-    rrr_val = row.get("required_run_rate", "")
-
-    if over_num == "" or runs_so_far == "" or rrr_val == "":
-        return "first_innings"
-
-    over_num = float(over_num)
-    runs_so_far = float(runs_so_far)
-    rrr_val = float(rrr_val)
-
-    current_rr = (runs_so_far / (over_num * 6)) * 6 if over_num > 0 else 0.0
-    pressure = rrr_val - current_rr
+    return np.searchsorted(WICKETS_BINS, wickets)
 
-    if pressure <= -4:
-        return "very_low"
-    elif pressure <= -1:
-        return "low"
-    elif pressure <= 1:
-        return "neutral"
-    elif pressure <= 4:
-        return "high"
-    else:
-        return "very_high"
+
+def run_pressure_bucket(innings, over_num, runs_so_far, rrr_val):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_rr = np.where(over_num > 0, (runs_so_far / (over_num * 6)) * 6, 0.0)
+    pressure = rrr_val - current_rr
+    first_innings = (innings == 1) | np.isnan(over_num) | np.isnan(runs_so_far) | np.isnan(rrr_val)
+    return np.where(first_innings, 0, np.searchsorted(PRESSURE_BINS, pressure) + 1)
 
 
 def elo_diff_bucket(elo_diff):
-    if elo_diff == "":
-        return "neutral"
-    elo_diff = float(elo_diff)
-    if elo_diff > 75:
-        return "strong_advantage"
-    elif elo_diff > 25:
-        return "moderate_advantage"
-    elif elo_diff >= -25:
-        return "neutral"
-    elif elo_diff >= -75:
-        return "moderate_disadvantage"
-    else:
-        return "strong_disadvantage"
-
-
-def bucketize(row):
-    ob = over_bucket(row["over_number"])
-    wb = wickets_bucket(row["wickets_so_far"])
-    rpb = run_pressure_bucket(row)
-    edb = elo_diff_bucket(row.get("elo_rating_difference", ""))
-    return ob, wb, rpb, edb
-
-
-def build_model_from_rows(train_rows):
-    counts = defaultdict(lambda: {"total": 0, "wins": 0})
-
-    for row in train_rows:
-        key = bucketize(row)
-        counts[key]["total"] += 1
-        if row["batting_team"] == row["eventual_winner"]:
-            counts[key]["wins"] += 1
-
-    level2 = defaultdict(lambda: {"total": 0, "wins": 0})
-    level3 = defaultdict(lambda: {"total": 0, "wins": 0})
-    level4 = defaultdict(lambda: {"total": 0, "wins": 0})
-    global_total = 0
-    global_wins = 0
-
-    for (ob, wb, rpb, edb), s in counts.items():
-        level2[(ob, wb, rpb)]["total"] += s["total"]
-        level2[(ob, wb, rpb)]["wins"] += s["wins"]
-        level3[(ob, wb)]["total"] += s["total"]
-        level3[(ob, wb)]["wins"] += s["wins"]
-        level4[(ob,)]["total"] += s["total"]
-        level4[(ob,)]["wins"] += s["wins"]
-        global_total += s["total"]
-        global_wins += s["wins"]
+    code = np.searchsorted([-75, -25], elo_diff, side="right") + np.searchsorted([25, 75], elo_diff)
+    return np.where(np.isnan(elo_diff), ELO_LABELS.index("neutral"), code)
+
+
+def read_processed(path, columns, **csv_kwargs):
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet_path, columns=columns, engine="pyarrow")
+    return pd.read_csv(path, usecols=columns, **csv_kwargs)
+
+
+def load_snapshots(input_path, metadata_path):
+    df = read_processed(input_path, INPUT_COLUMNS, float_precision="round_trip")
+    df["match_id"] = df["match_id"].astype(str)
+    dates = pd.read_csv(metadata_path, usecols=["match_id", "date"], dtype=str)
+    df = df.merge(dates, on="match_id", how="left")
+    df["year"] = df["date"].str[:4].astype(int)
+
+    over_num = df["over_number"].to_numpy(dtype=float)
+    codes = {
+        "ob": over_bucket(over_num).astype(np.int8),
+        "wb": wickets_bucket(df["wickets_so_far"].to_numpy()).astype(np.int8),
+        "rpb": run_pressure_bucket(df["innings_number"].to_numpy(), over_num,
+                                   df["runs_so_far"].to_numpy(dtype=float),
+                                   df["required_run_rate"].to_numpy(dtype=float)).astype(np.int8),
+        "edb": elo_diff_bucket(df["elo_rating_difference"].to_numpy(dtype=float)).astype(np.int8),
+    }
+    return {
+        "year": df["year"].to_numpy(dtype=np.int16),
+        "match_code": pd.factorize(df["match_id"])[0].astype(np.int32),
+        "is_win": (df["batting_team"].to_numpy() == df["eventual_winner"].to_numpy()).astype(np.int8),
+        "bucket": np.ravel_multi_index(tuple(codes[c] for c in BUCKET_COLUMNS), TABLE_SHAPE).astype(np.int32),
+        **codes,
+    }
+
+
+def count_buckets_by_year(columns, all_years):
+    size = int(np.prod(TABLE_SHAPE))
+    year_idx = np.searchsorted(all_years, columns["year"]).astype(np.int64)
+    flat = year_idx * size + columns["bucket"]
+    n = len(all_years) * size
+    totals = np.bincount(flat, minlength=n).reshape(len(all_years), size)
+    wins = np.bincount(flat, weights=columns["is_win"], minlength=n).astype(np.int64).reshape(len(all_years), size)
+    return {year: np.stack([totals[i], wins[i]], axis=-1) for i, year in enumerate(all_years)}
+
+
+def build_model_from_counts(train_counts):
+    counts = train_counts.reshape(TABLE_SHAPE + (2,))
+
+    level2 = counts.sum(axis=3)
+    level3 = level2.sum(axis=2)
+    level4 = level3.sum(axis=1)
+    global_total, global_wins = level4.sum(axis=0)
 
     global_prob = global_wins / global_total if global_total > 0 else 0.5
 
-    def lookup(row):
-        ob, wb, rpb, edb = bucketize(row)
-        k1 = (ob, wb, rpb, edb)
-        if k1 in counts and counts[k1]["total"] >= MIN_SAMPLE:
-            s = counts[k1]
-            return s["wins"] / s["total"]
-        k2 = (ob, wb, rpb)
-        if level2[k2]["total"] >= MIN_SAMPLE:
-            return level2[k2]["wins"] / level2[k2]["total"]
-        k3 = (ob, wb)
-        if level3[k3]["total"] >= MIN_SAMPLE:
-            return level3[k3]["wins"] / level3[k3]["total"]
-        k4 = (ob,)
-        if level4[k4]["total"] >= MIN_SAMPLE:
-            return level4[k4]["wins"] / level4[k4]["total"]
-        return global_prob
+    def lookup(ob, wb, rpb, edb):
+        probs = np.full(len(ob), global_prob)
+        for s in (level4[ob], level3[ob, wb], level2[ob, wb, rpb], counts[ob, wb, rpb, edb]):
+            use = s[:, 0] >= MIN_SAMPLE
+            probs[use] = s[use, 1] / s[use, 0]
+        return probs
 
     return lookup
 
 
-def compute_calibration(predictions):
-    decile_bins = [{"total": 0, "actual_wins": 0, "sum_pred": 0.0} for _ in range(10)]
+def compute_calibration(preds, actuals):
+    idx = np.minimum((preds * 10).astype(np.int64), 9)
+    totals = np.bincount(idx, minlength=10)
+    wins = np.bincount(idx, weights=actuals, minlength=10)
+    return [round(w / t, 4) if t > 0 else "" for t, w in zip(totals.tolist(), wins.tolist())]
 
-    for pred, actual in predictions:
-        idx = min(int(pred * 10), 9)
-        decile_bins[idx]["total"] += 1
-        decile_bins[idx]["actual_wins"] += actual
-        decile_bins[idx]["sum_pred"] += pred
 
-    calibration = []
-    for b in decile_bins:
-        if b["total"] > 0:
-            calibration.append(round(b["actual_wins"] / b["total"], 4))
-        else:
-            calibration.append("")
+def score_window(preds, actuals):
+    eps = 1e-15
+    p_clipped = np.clip(preds, eps, 1 - eps)
+    log_losses = -(actuals * np.log(p_clipped) + (1 - actuals) * np.log(1 - p_clipped))
 
-    return calibration
+    n = len(preds)
+    brier = round(float(((preds - actuals) ** 2).sum()) / n, 6)
+    ll = round(float(log_losses.sum()) / n, 6)
+    acc = round(int(((preds >= 0.5) == actuals).sum()) / n, 4)
+    avg_pred = round(float(preds.sum()) / n, 4)
+
+    return brier, ll, acc, avg_pred, compute_calibration(preds, actuals)
 
 
 def build_rolling_backtest():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
     metadata_path = os.path.join(PROCESSED_DIR, "match_metadata.csv")
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        meta_rows = list(csv.DictReader(f))
-    match_dates = {r["match_id"]: r["date"] for r in meta_rows}
-
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
+    columns = load_snapshots(INPUT_PATH, metadata_path)
+    years = columns["year"]
 
-    for row in all_rows:
-        row["date"] = match_dates.get(row["match_id"], "")
+    all_years = np.unique(years).tolist()
+    year_counts = count_buckets_by_year(columns, all_years)
 
-    all_years = sorted(set(get_year(r["date"]) for r in all_rows if r.get("date", "")))
+    train_counts = np.zeros((int(np.prod(TABLE_SHAPE)), 2), dtype=np.int64)
+    train_years = set()
 
     results = []
     window_num = 0
@@ -200,51 +168,34 @@ def build_rolling_backtest():
         if train_start < all_years[0]:
             continue
 
-        train_rows = [r for r in all_rows if train_start <= get_year(r["date"]) <= train_end]
-        test_rows = [r for r in all_rows if get_year(r["date"]) == test_year]
+        window_years = {y for y in all_years if train_start <= y <= train_end}
+        for y in train_years - window_years:
+            train_counts -= year_counts[y]
+        for y in window_years - train_years:
+            train_counts += year_counts[y]
+        train_years = window_years
+
+        test_mask = years == test_year
+        train_rows = int(train_counts[:, 0].sum())
+        test_rows = int(test_mask.sum())
 
         if not train_rows or not test_rows:
             continue
 
         window_num += 1
-        lookup_fn = build_model_from_rows(train_rows)
-
-        predictions = []
-        correct = 0
-        brier_sum = 0.0
-        log_loss_sum = 0.0
-
-        for row in test_rows:
-            pred = lookup_fn(row)
-            actual = 1 if row["batting_team"] == row["eventual_winner"] else 0
-
-            predictions.append((pred, actual))
-            brier_sum += (pred - actual) ** 2
-
-            eps = 1e-15
-            p_clipped = max(eps, min(1 - eps, pred))
-            log_loss_sum += -(actual * math.log(p_clipped) + (1 - actual) * math.log(1 - p_clipped))
-
-            predicted_win = 1 if pred >= 0.5 else 0
-            if predicted_win == actual:
-                correct += 1
-
-        n = len(test_rows)
-        brier = round(brier_sum / n, 6)
-        ll = round(log_loss_sum / n, 6)
-        acc = round(correct / n, 4)
-        avg_pred = round(sum(p for p, _ in predictions) / n, 4)
+        lookup_fn = build_model_from_counts(train_counts)
 
-        calibration = compute_calibration(predictions)
-        test_matches = len(set(r["match_id"] for r in test_rows))
+        preds = lookup_fn(*(columns[c][test_mask] for c in BUCKET_COLUMNS))
+        brier, ll, acc, avg_pred, calibration = score_window(preds, columns["is_win"][test_mask])
+        test_matches = np.unique(columns["match_code"][test_mask]).size
 
         result = {
             "window": window_num,
             "train_start": train_start,
             "train_end": train_end,
             "test_year": test_year,
-            "train_rows": len(train_rows),
-            "test_rows": n,
+            "train_rows": train_rows,
+            "test_rows": test_rows,
             "test_matches": test_matches,
             "brier_score": brier,
             "log_loss": ll,
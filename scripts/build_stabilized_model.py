@@ -1,9 +1,11 @@
 import csv
 import os
 
+import pandas as pd
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
-INPUT_PATH = os.path.join(PROCESSED_DIR, "statistical_bucket_model_with_stability.csv")
+INPUT_PATH = os.path.join(PROCESSED_DIR, "statistical_bucket_model_with_stability.parquet")
 OUTPUT_PATH = os.path.join(PROCESSED_DIR, "statistical_bucket_model_stabilized.csv")
 
 MIN_SAMPLE = 50
@@ -19,13 +21,7 @@ OUTPUT_FIELDS = [
 def build_stabilized_model():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-
-    for r in rows:
-        r["sample_size"] = int(r["sample_size"])
-        r["win_probability"] = float(r["win_probability"])
-        r["batting_team_wins"] = int(r["batting_team_wins"])
+    rows = pd.read_parquet(INPUT_PATH).to_dict("records")
 
     level2 = {}
     level3 = {}
@@ -61,57 +57,47 @@ def build_stabilized_model():
     used_fallback = 0
     fallback_counts = {2: 0, 3: 0, 4: 0, 5: 0}
 
-    output_rows = []
-    for r in rows:
-        n = r["sample_size"]
+    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(OUTPUT_FIELDS)
 
-        if n >= MIN_SAMPLE:
-            final_prob = r["win_probability"]
-            level = 1
-            used_raw += 1
-        else:
-            k2 = (r["over_bucket"], r["wickets_bucket"], r["run_pressure_bucket"])
-            k3 = (r["over_bucket"], r["wickets_bucket"])
-            k4 = (r["over_bucket"],)
-
-            if level2[k2]["total"] >= MIN_SAMPLE:
-                final_prob = level2[k2]["wins"] / level2[k2]["total"]
-                level = 2
-            elif level3[k3]["total"] >= MIN_SAMPLE:
-                final_prob = level3[k3]["wins"] / level3[k3]["total"]
-                level = 3
-            elif level4[k4]["total"] >= MIN_SAMPLE:
-                final_prob = level4[k4]["wins"] / level4[k4]["total"]
-                level = 4
-            else:
-                final_prob = global_prob
-                level = 5
-
-            used_fallback += 1
-            fallback_counts[level] += 1
-
-        output_rows.append({
-            "over_bucket": r["over_bucket"],
-            "wickets_bucket": r["wickets_bucket"],
-            "run_pressure_bucket": r["run_pressure_bucket"],
-            "elo_diff_bucket": r["elo_diff_bucket"],
-            "sample_size": r["sample_size"],
-            "batting_team_wins": r["batting_team_wins"],
-            "win_probability": r["win_probability"],
-            "standard_error": r["standard_error"],
-            "ci_lower_95": r["ci_lower_95"],
-            "ci_upper_95": r["ci_upper_95"],
-            "final_stabilized_probability": round(final_prob, 4),
-            "fallback_level": level,
-        })
+        for r in rows:
+            n = r["sample_size"]
 
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(output_rows)
+            if n >= MIN_SAMPLE:
+                final_prob = r["win_probability"]
+                level = 1
+                used_raw += 1
+            else:
+                k2 = (r["over_bucket"], r["wickets_bucket"], r["run_pressure_bucket"])
+                k3 = (r["over_bucket"], r["wickets_bucket"])
+                k4 = (r["over_bucket"],)
+
+                if level2[k2]["total"] >= MIN_SAMPLE:
+                    final_prob = level2[k2]["wins"] / level2[k2]["total"]
+                    level = 2
+                elif level3[k3]["total"] >= MIN_SAMPLE:
+                    final_prob = level3[k3]["wins"] / level3[k3]["total"]
+                    level = 3
+                elif level4[k4]["total"] >= MIN_SAMPLE:
+                    final_prob = level4[k4]["wins"] / level4[k4]["total"]
+                    level = 4
+                else:
+                    final_prob = global_prob
+                    level = 5
+
+                used_fallback += 1
+                fallback_counts[level] += 1
+
+            writer.writerow((
+                r["over_bucket"], r["wickets_bucket"], r["run_pressure_bucket"], r["elo_diff_bucket"],
+                r["sample_size"], r["batting_team_wins"], r["win_probability"],
+                r["standard_error"], r["ci_lower_95"], r["ci_upper_95"],
+                round(final_prob, 4), level,
+            ))
 
     print("\n=== build_stabilized_model.py Summary ===")
-    print(f"  Total buckets                  : {len(output_rows)}")
+    print(f"  Total buckets                  : {len(rows)}")
     print(f"  Using raw probability (L1)     : {used_raw}")
     print(f"  Using fallback                 : {used_fallback}")
     print(f"    Fallback to Level 2          : {fallback_counts[2]}")
@@ -121,8 +107,6 @@ def build_stabilized_model():
     print(f"  Global baseline win rate       : {global_prob:.4f}")
     print(f"  Output                         : {OUTPUT_PATH}")
 
-    return output_rows
-
 
 if __name__ == "__main__":
     build_stabilized_model()
@@ -1,13 +1,28 @@
-import csv
 import os
-import sys
-from collections import defaultdict
+
+import numpy as np
+import pandas as pd
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 INPUT_PATH = os.path.join(PROCESSED_DIR, "over_state_snapshots_enriched.csv")
 OUTPUT_PATH = os.path.join(PROCESSED_DIR, "statistical_bucket_model.csv")
 
+INPUT_COLUMNS = [
+    "innings_number", "over_number", "runs_so_far", "wickets_so_far", "balls_remaining",
+    "target", "required_run_rate", "batting_team", "eventual_winner", "elo_rating_difference",
+]
+BUCKET_FIELDS = ["over_bucket", "wickets_bucket", "run_pressure_bucket", "elo_diff_bucket"]
+
+OVER_LABELS = np.array(["1-3", "4-6", "7-10", "11-15", "16-20"])
+OVER_BINS = [3, 6, 10, 15]
+WICKETS_LABELS = np.array(["0-1", "2-3", "4-6", "7+"])
+WICKETS_BINS = [1, 3, 6]
+PRESSURE_LABELS = np.array(["very_low", "low", "neutral", "high", "very_high"])
+PRESSURE_BINS = [-4, -1, 1, 4]
+ELO_LABELS = np.array(["strong_disadvantage", "moderate_disadvantage", "neutral",
+                       "moderate_advantage", "strong_advantage"])
+
 OUTPUT_FIELDS = [
     "over_bucket", "wickets_bucket", "run_pressure_bucket", "elo_diff_bucket",
     "total_samples", "batting_team_wins", "win_probability"
@@ -15,148 +30,76 @@ OUTPUT_FIELDS = [
 
 
 def over_bucket(over_num):
-    over_num = int(over_num)
-    if over_num <= 3:
-        return "1-3"
-    elif over_num <= 6:
-        return "4-6"
-    elif over_num <= 10:
-        return "7-10"
-    elif over_num <= 15:
-        return "11-15"
-    else:
-        return "16-20"
+    return OVER_LABELS[np.searchsorted(OVER_BINS, over_num)]
 
 
 def wickets_bucket(wickets):
-    wickets = int(wickets)
-    if wickets <= 1:
-        return "0-1"
-    elif wickets <= 3:
-        return "2-3"
-    elif wickets <= 6:
-        return "4-6"
-    else:
-        return "7+"
-
-
-def run_pressure_bucket(row):
-    innings = int(row["innings_number"])
-    if innings == 1:
-        return "first_innings"
-
-    target = row.get("target", "")
-    balls_rem = row.get("balls_remaining", "")
-    runs_so_far = row.get("runs_so_far", "")
-    over_num = row.get("over_number", "")
-
-    if target == "" or balls_rem == "" or runs_so_far == "" or over_num == "":
-        return "first_innings"
-
-    target = float(target)
-    balls_rem = float(balls_rem)
-    runs_so_far = float(runs_so_far)
-    over_num = float(over_num)
-
-    if over_num > 0:
-        current_rr = (runs_so_far / (over_num * 6)) * 6
-    else:
-        current_rr = 0.0
-
-    rrr_val = float(row.get("required_run_rate", 0))
-    pressure = rrr_val - current_rr
-
-    if pressure <= -4:
-        return "very_low"
-    elif pressure <= -1:
-        return "low"
-    elif pressure <= 1:
-        return "neutral"
-    elif pressure <= 4:
-        return "high"
-    else:
-        return "very_high"
+    return WICKETS_LABELS[np.searchsorted(WICKETS_BINS, wickets)]
 
 
-def elo_diff_bucket(elo_diff):
-    if elo_diff == "":
-        return "neutral"
-    elo_diff = float(elo_diff)
-    if elo_diff > 75:
-        return "strong_advantage"
-    elif elo_diff > 25:
-        return "moderate_advantage"
-    elif elo_diff >= -25:
-        return "neutral"
-    elif elo_diff >= -75:
-        return "moderate_disadvantage"
-    else:
-        return "strong_disadvantage"
-
-
-def get_statistical_win_probability(state_row):
-    ob = over_bucket(state_row["over_number"])
-    wb = wickets_bucket(state_row["wickets_so_far"])
-    rpb = run_pressure_bucket(state_row)
-    edb = elo_diff_bucket(state_row.get("elo_rating_difference", ""))
-    return ob, wb, rpb, edb
+def run_pressure_bucket(df):
+    over_num = df["over_number"].to_numpy(dtype=float)
+    runs_so_far = df["runs_so_far"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_rr = np.where(over_num > 0, (runs_so_far / (over_num * 6)) * 6, 0.0)
+    pressure = df["required_run_rate"].to_numpy(dtype=float) - current_rr
 
+    first_innings = ((df["innings_number"].to_numpy() == 1)
+                     | df[["target", "balls_remaining", "runs_so_far", "over_number"]].isna().any(axis=1).to_numpy())
+    return np.where(first_innings, "first_innings", PRESSURE_LABELS[np.searchsorted(PRESSURE_BINS, pressure)])
 
-def build_statistical_bucket_model():
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
+def elo_diff_bucket(elo_diff):
+    code = np.searchsorted([-75, -25], elo_diff, side="right") + np.searchsorted([25, 75], elo_diff)
+    return np.where(np.isnan(elo_diff), "neutral", ELO_LABELS[code])
+
 
-    bucket_counts = defaultdict(lambda: {"total": 0, "wins": 0})
+def get_statistical_win_probability(df):
+    return df.assign(
+        over_bucket=over_bucket(df["over_number"].to_numpy()),
+        wickets_bucket=wickets_bucket(df["wickets_so_far"].to_numpy()),
+        run_pressure_bucket=run_pressure_bucket(df),
+        elo_diff_bucket=elo_diff_bucket(df["elo_rating_difference"].to_numpy(dtype=float)),
+        is_win=(df["batting_team"].to_numpy() == df["eventual_winner"].to_numpy()).astype(np.int64),
+    )
 
-    for row in rows:
-        ob, wb, rpb, edb = get_statistical_win_probability(row)
-        key = (ob, wb, rpb, edb)
 
-        bucket_counts[key]["total"] += 1
+def read_processed(path, columns, **csv_kwargs):
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet_path, columns=columns, engine="pyarrow")
+    return pd.read_csv(path, usecols=columns, **csv_kwargs)
 
-        batting_team = row["batting_team"]
-        eventual_winner = row["eventual_winner"]
-        if batting_team == eventual_winner:
-            bucket_counts[key]["wins"] += 1
 
-    output_rows = []
-    for (ob, wb, rpb, edb), stats in sorted(bucket_counts.items()):
-        win_prob = round(stats["wins"] / stats["total"], 4) if stats["total"] > 0 else 0.0
-        output_rows.append({
-            "over_bucket": ob,
-            "wickets_bucket": wb,
-            "run_pressure_bucket": rpb,
-            "elo_diff_bucket": edb,
-            "total_samples": stats["total"],
-            "batting_team_wins": stats["wins"],
-            "win_probability": win_prob,
-        })
+def build_statistical_bucket_model():
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+
+    rows = get_statistical_win_probability(
+        read_processed(INPUT_PATH, INPUT_COLUMNS, float_precision="round_trip"))
 
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(output_rows)
+    output = (rows.groupby(BUCKET_FIELDS)["is_win"].agg(["size", "sum"])
+              .reset_index()
+              .rename(columns={"size": "total_samples", "sum": "batting_team_wins"}))
+    output["win_probability"] = (output["batting_team_wins"] / output["total_samples"]).round(4)
+    output.to_csv(OUTPUT_PATH, columns=OUTPUT_FIELDS, index=False, lineterminator="\r\n")
 
     print("\n=== build_statistical_bucket_model.py Summary ===")
     print(f"  Total snapshot rows processed  : {len(rows)}")
-    print(f"  Unique bucket combinations     : {len(output_rows)}")
+    print(f"  Unique bucket combinations     : {len(output)}")
     print(f"  Output                         : {OUTPUT_PATH}")
 
-    first_inn = [r for r in output_rows if r["run_pressure_bucket"] == "first_innings"]
-    second_inn = [r for r in output_rows if r["run_pressure_bucket"] != "first_innings"]
-    print(f"  First innings buckets          : {len(first_inn)}")
-    print(f"  Second innings buckets         : {len(second_inn)}")
+    first_inn = int((output["run_pressure_bucket"] == "first_innings").sum())
+    print(f"  First innings buckets          : {first_inn}")
+    print(f"  Second innings buckets         : {len(output) - first_inn}")
 
     print(f"\n  Sample rows (highest sample count):")
-    top = sorted(output_rows, key=lambda r: r["total_samples"], reverse=True)[:5]
-    for r in top:
-        print(f"    over={r['over_bucket']:5s} wkt={r['wickets_bucket']:3s} "
-              f"pressure={r['run_pressure_bucket']:14s} elo={r['elo_diff_bucket']:24s} "
-              f"n={r['total_samples']:5d} win_prob={r['win_probability']:.4f}")
+    top = output.sort_values("total_samples", ascending=False, kind="stable").head(5)
+    for r in top.itertuples(index=False):
+        print(f"    over={r.over_bucket:5s} wkt={r.wickets_bucket:3s} "
+              f"pressure={r.run_pressure_bucket:14s} elo={r.elo_diff_bucket:24s} "
+              f"n={r.total_samples:5d} win_prob={r.win_probability:.4f}")
 
-    return output_rows
+    return output
 
 
 if __name__ == "__main__":
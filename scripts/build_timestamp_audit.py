@@ -1,7 +1,7 @@
-import csv
 import os
-from collections import defaultdict
-from datetime import datetime
+
+import numpy as np
+import pandas as pd
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -11,6 +11,7 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "timestamp_audit_results.csv")
 
 MINUTES_PER_OVER = 4
 INNINGS_BREAK_MINUTES = 20
+SECOND_INNINGS_OFFSET = 20 * MINUTES_PER_OVER + INNINGS_BREAK_MINUTES
 
 OUTPUT_FIELDS = [
     "match_id", "date", "innings_number", "over_number",
@@ -24,159 +25,135 @@ OUTPUT_FIELDS = [
     "edge_after_delay_penalty",
 ]
 
+LEAKAGE_LEVELS = ["none", "low", "medium", "high", "critical"]
+RISK_RANK = {risk: i for i, risk in enumerate(LEAKAGE_LEVELS)}
+LEAKAGE_BINS = np.array([-10, -2, 1, 5])
+LEAKAGE_LABELS = np.array(LEAKAGE_LEVELS, dtype=object)
+LEAKAGE_SEVERITY = np.array([
+    "Fetch timestamp well before over — stale odds possible",
+    "Fetch timestamp before over end — likely clean",
+    "Fetch timestamp near over end — possible contemporaneous",
+    "Fetch timestamp 1-5min after over end — probable leakage",
+    "Fetch timestamp >5min after over end — likely post-result odds",
+], dtype=object)
 
-def determine_match_slot(match_id, date_str, metadata_by_date):
-    day_matches = metadata_by_date.get(date_str, [])
-    if len(day_matches) <= 1:
-        return 14
-    sorted_matches = sorted(day_matches, key=lambda m: int(m["match_id"]))
-    if str(match_id) == str(sorted_matches[0]["match_id"]):
-        return 10
-    return 14
 
+def build_early_slots(metadata):
+    doubles = metadata[metadata.groupby("date")["match_id"].transform("size") > 1]
+    first = doubles["match_id"].astype(np.int64).groupby(doubles["date"]).idxmin()
+    return pd.MultiIndex.from_frame(metadata.loc[first, ["date", "match_id"]])
 
-def estimate_over_end_time(date_str, innings_number, over_number, start_hour):
-    innings = int(innings_number)
-    over = int(over_number)
 
-    if innings == 1:
-        minutes_offset = (over + 1) * MINUTES_PER_OVER
-    else:
-        minutes_offset = 20 * MINUTES_PER_OVER + INNINGS_BREAK_MINUTES + (over + 1) * MINUTES_PER_OVER
+def estimate_over_end_time(date, innings_number, over_number, start_hour):
+    innings = innings_number.to_numpy(dtype=np.int64)
+    over = over_number.to_numpy(dtype=np.int64)
 
+    minutes_offset = (over + 1) * MINUTES_PER_OVER + np.where(innings == 1, 0, SECOND_INNINGS_OFFSET)
     total_minutes = start_hour * 60 + minutes_offset
-    hours = total_minutes // 60
-    mins = total_minutes % 60
-    return f"{date_str}T{hours:02d}:{mins:02d}:00Z"
 
+    # Only a few dozen distinct clock times occur, so format each once.
+    clock_minutes, clock_idx = np.unique(total_minutes, return_inverse=True)
+    clock = np.array([f"T{m // 60:02d}:{m % 60:02d}:00Z" for m in clock_minutes.tolist()],
+                     dtype=object)
+
+    over_end = date + clock[clock_idx]
+    over_end_dt = parse_ts(date, "%Y-%m-%d") + pd.to_timedelta(total_minutes, unit="m")
+    return over_end, over_end_dt
 
-def parse_ts(ts_str):
-    return datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%SZ")
+
+def parse_ts(ts, fmt="%Y-%m-%dT%H:%M:%SZ"):
+    codes, uniques = pd.factorize(ts)
+    if fmt.endswith("Z"):
+        # A literal "Z" knocks pandas off its ISO-8601 fast path, so parse
+        # the naive prefix and reject anything that was not Z-suffixed.
+        parsed = pd.to_datetime(uniques.str[:-1], format=fmt[:-1], errors="coerce")
+        parsed = parsed.where(uniques.str.endswith("Z"))
+    else:
+        parsed = pd.to_datetime(uniques, format=fmt, errors="coerce")
+    return pd.Series(parsed.take(codes), index=ts.index)
 
 
 def main():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        metadata = list(csv.DictReader(f))
-
-    metadata_by_date = defaultdict(list)
-    for m in metadata:
-        metadata_by_date[m["date"]].append(m)
-
-    mi_timestamps = defaultdict(set)
-    for r in rows:
-        mi_timestamps[(r["match_id"], r["innings_number"])].add(r["fetch_timestamp"])
-
-    audit_rows = []
-    leakage_counts = {"none": 0, "low": 0, "medium": 0, "high": 0, "critical": 0}
-
-    for row in rows:
-        mid = row["match_id"]
-        date_str = row["date"]
-        inn = row["innings_number"]
-        over = row["over_number"]
-
-        start_hour = determine_match_slot(mid, date_str, metadata_by_date)
-        over_end = estimate_over_end_time(date_str, inn, over, start_hour)
-
-        fetch_ts = row["fetch_timestamp"]
-        single_ts = len(mi_timestamps[(mid, inn)]) == 1
-
-        try:
-            fetch_dt = parse_ts(fetch_ts)
-            over_end_dt = parse_ts(over_end)
-            delta_minutes = (fetch_dt - over_end_dt).total_seconds() / 60.0
-        except Exception:
-            delta_minutes = 0.0
-
-        if delta_minutes > 5:
-            leakage_risk = "critical"
-            leakage_severity = "Fetch timestamp >5min after over end — likely post-result odds"
-        elif delta_minutes > 1:
-            leakage_risk = "high"
-            leakage_severity = "Fetch timestamp 1-5min after over end — probable leakage"
-        elif delta_minutes > -2:
-            leakage_risk = "medium"
-            leakage_severity = "Fetch timestamp near over end — possible contemporaneous"
-        elif delta_minutes > -10:
-            leakage_risk = "low"
-            leakage_severity = "Fetch timestamp before over end — likely clean"
-        else:
-            leakage_risk = "none"
-            leakage_severity = "Fetch timestamp well before over — stale odds possible"
-
-        if single_ts:
-            leakage_risk = max(leakage_risk, "medium",
-                               key=["none", "low", "medium", "high", "critical"].index)
-            leakage_severity += " | SAME timestamp for all overs in innings"
-
-        leakage_counts[leakage_risk] = leakage_counts.get(leakage_risk, 0) + 1
-
-        raw_odds = float(row["market_odds_1"])
-        slipped_odds = max(1.01, raw_odds - 0.02)
-        edge_after_delay = float(row["edge"]) - 0.01
-
-        audit_rows.append({
-            "match_id": mid,
-            "date": date_str,
-            "innings_number": inn,
-            "over_number": over,
-            "batting_team": row["batting_team"],
-            "bowling_team": row["bowling_team"],
-            "model_probability": row["model_probability"],
-            "market_prob_1": row["market_prob_1"],
-            "edge": row["edge"],
-            "fetch_timestamp": fetch_ts,
-            "estimated_over_end_time": over_end,
-            "timestamp_vs_over_delta_minutes": round(delta_minutes, 1),
-            "leakage_risk": leakage_risk,
-            "leakage_severity": leakage_severity,
-            "single_ts_per_innings": single_ts,
-            "bookmaker_used": row.get("bookmaker_used", ""),
-            "market_odds_1": raw_odds,
-            "effective_odds_after_slippage": round(slipped_odds, 4),
-            "edge_after_delay_penalty": round(edge_after_delay, 6),
-        })
-
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(audit_rows)
-
+    df = pd.read_csv(INPUT_PATH, dtype=str, keep_default_na=False)
+    metadata = pd.read_csv(METADATA_PATH, usecols=["match_id", "date"], dtype=str,
+                           keep_default_na=False)
+
+    early_slots = build_early_slots(metadata)
+
+    single_ts = (df.groupby(["match_id", "innings_number"])["fetch_timestamp"]
+                 .transform("nunique") == 1)
+
+    is_early = pd.MultiIndex.from_frame(df[["date", "match_id"]]).isin(early_slots)
+    start_hour = np.where(is_early, 10, 14)
+    over_end, over_end_dt = estimate_over_end_time(df["date"], df["innings_number"],
+                                                   df["over_number"], start_hour)
+
+    fetch_dt = parse_ts(df["fetch_timestamp"])
+    delta_minutes = ((fetch_dt - over_end_dt).dt.total_seconds() / 60.0).fillna(0.0)
+
+    single = single_ts.to_numpy()
+    leakage_idx = np.searchsorted(LEAKAGE_BINS, delta_minutes.to_numpy())
+    leakage_severity = pd.Series(LEAKAGE_SEVERITY[leakage_idx], index=df.index)
+    leakage_severity = leakage_severity.where(
+        ~single, leakage_severity + " | SAME timestamp for all overs in innings")
+    leakage_idx = np.where(single, np.maximum(leakage_idx, RISK_RANK["medium"]), leakage_idx)
+    leakage_risk = LEAKAGE_LABELS[leakage_idx]
+
+    leakage_counts = np.bincount(leakage_idx, minlength=len(LEAKAGE_LEVELS))
+
+    raw_odds = df["market_odds_1"].astype(float)
+    slipped_odds = np.maximum(1.01, raw_odds - 0.02)
+    edges_gross = df["edge"].astype(float)
+    edge_after_delay = edges_gross - 0.01
+
+    deltas = delta_minutes.round(1)
+    edges_adj = edge_after_delay.round(6)
+
+    df["estimated_over_end_time"] = over_end
+    df["timestamp_vs_over_delta_minutes"] = deltas
+    df["leakage_risk"] = leakage_risk
+    df["leakage_severity"] = leakage_severity
+    df["single_ts_per_innings"] = single_ts
+    if "bookmaker_used" not in df:
+        df["bookmaker_used"] = ""
+    df["market_odds_1"] = raw_odds
+    df["effective_odds_after_slippage"] = slipped_odds.round(4)
+    df["edge_after_delay_penalty"] = edges_adj
+    df.to_csv(OUTPUT_PATH, columns=OUTPUT_FIELDS, index=False, lineterminator="\r\n")
+
+    total = len(df)
     print(f"\n=== build_timestamp_audit.py ===")
-    print(f"  Total snapshots audited: {len(audit_rows)}")
+    print(f"  Total snapshots audited: {total}")
     print(f"\n  Leakage Risk Distribution:")
-    for risk in ["none", "low", "medium", "high", "critical"]:
-        cnt = leakage_counts.get(risk, 0)
-        pct = cnt / len(audit_rows) * 100 if audit_rows else 0
+    for risk, cnt in zip(LEAKAGE_LEVELS, leakage_counts.tolist()):
+        pct = cnt / total * 100 if total else 0
         print(f"    {risk:>10s}: {cnt:>6d} ({pct:.1f}%)")
 
-    single_ts_count = sum(1 for r in audit_rows if r["single_ts_per_innings"])
-    print(f"\n  Single-timestamp innings: {single_ts_count}/{len(audit_rows)} "
-          f"({single_ts_count/len(audit_rows)*100:.1f}%)")
+    single_ts_count = int(np.count_nonzero(single))
+    print(f"\n  Single-timestamp innings: {single_ts_count}/{total} "
+          f"({single_ts_count/total*100:.1f}%)")
 
-    deltas = [r["timestamp_vs_over_delta_minutes"] for r in audit_rows]
-    if deltas:
-        import statistics
+    if total:
+        sorted_deltas = np.sort(deltas.to_numpy())
+        mid = total // 2
+        median = sorted_deltas[mid] if total % 2 else (sorted_deltas[mid - 1] + sorted_deltas[mid]) / 2
+        mean = sorted_deltas.mean()
+        stdev = np.sqrt(np.square(sorted_deltas - mean).sum() / (total - 1)) if total > 1 else 0.0
         print(f"\n  Timestamp vs Over-End Delta (minutes):")
-        print(f"    Min   : {min(deltas):.1f}")
-        print(f"    Max   : {max(deltas):.1f}")
-        print(f"    Median: {statistics.median(deltas):.1f}")
-        print(f"    Mean  : {statistics.mean(deltas):.1f}")
-        print(f"    StdDev: {statistics.stdev(deltas):.1f}")
-
-    edges_gross = [float(r["edge"]) for r in audit_rows]
-    edges_adj = [r["edge_after_delay_penalty"] for r in audit_rows]
-    if edges_gross:
-        import statistics
+        print(f"    Min   : {sorted_deltas[0]:.1f}")
+        print(f"    Max   : {sorted_deltas[-1]:.1f}")
+        print(f"    Median: {median:.1f}")
+        print(f"    Mean  : {mean:.1f}")
+        print(f"    StdDev: {stdev:.1f}")
+
+        gross_mean = edges_gross.mean()
+        adj_mean = edges_adj.mean()
         print(f"\n  Edge Comparison:")
-        print(f"    Gross avg edge      : {statistics.mean(edges_gross):.4f}")
-        print(f"    After delay penalty : {statistics.mean(edges_adj):.4f}")
-        print(f"    Edge reduction      : {statistics.mean(edges_gross) - statistics.mean(edges_adj):.4f}")
+        print(f"    Gross avg edge      : {gross_mean:.4f}")
+        print(f"    After delay penalty : {adj_mean:.4f}")
+        print(f"    Edge reduction      : {gross_mean - adj_mean:.4f}")
 
     print(f"\n  CRITICAL FINDING:")
     print(f"    All {single_ts_count} snapshots use a single timestamp per match-innings.")
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
+
+COMPRESSION = "snappy"
+
+
+def convert_to_parquet():
+    csv_files = sorted(f for f in os.listdir(PROCESSED_DIR) if f.endswith(".csv"))
+
+    converted = []
+    csv_bytes = 0
+    parquet_bytes = 0
+
+    for filename in csv_files:
+        csv_path = os.path.join(PROCESSED_DIR, filename)
+        parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+
+        df = pd.read_csv(csv_path, low_memory=False)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), parquet_path,
+                       compression=COMPRESSION)
+
+        csv_bytes += os.path.getsize(csv_path)
+        parquet_bytes += os.path.getsize(parquet_path)
+        converted.append((filename, len(df)))
+
+    print("\n=== convert_to_parquet.py Summary ===")
+    print(f"  Files converted            : {len(converted)}")
+    print(f"  Compression                : {COMPRESSION}")
+    print(f"  Total CSV size             : {csv_bytes / 1e6:.2f} MB")
+    print(f"  Total Parquet size         : {parquet_bytes / 1e6:.2f} MB")
+    print(f"  Output directory           : {PROCESSED_DIR}")
+    for filename, n_rows in converted:
+        print(f"    - {filename:50s} {n_rows:>7d} rows")
+
+    return converted
+
+
+if __name__ == "__main__":
+    convert_to_parquet()
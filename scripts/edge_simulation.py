@@ -1,5 +1,8 @@
 import csv
 import os
+from operator import itemgetter
+
+import numpy as np
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -9,6 +12,11 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "edge_simulation_results.csv")
 
 THRESHOLDS = [0.03, 0.05, 0.07, 0.10]
 
+MATCH_FIELDS = [
+    "match_id", "date", "team_1", "team_2", "winner",
+    "team_1_market_prob", "team_2_market_prob", "team_1_odds", "team_2_odds",
+]
+
 OUTPUT_FIELDS = [
     "threshold", "total_bets", "wins", "losses",
     "win_rate", "total_staked", "total_return",
@@ -19,40 +27,44 @@ OUTPUT_FIELDS = [
 def load_model_probs():
     elo_path = ELO_HISTORY_PATH
     with open(elo_path, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    lookup = {}
-    for r in rows:
-        lookup[r["match_id"]] = {
-            "team_1": r["team_1"],
-            "team_2": r["team_2"],
-            "exp_win_1": float(r["expected_win_probability_team_1"]),
-            "exp_win_2": float(r["expected_win_probability_team_2"]),
-        }
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        mid_i, t1_i, t2_i = col["match_id"], col["team_1"], col["team_2"]
+        p1_i = col["expected_win_probability_team_1"]
+        p2_i = col["expected_win_probability_team_2"]
+        lookup = {}
+        for r in reader:
+            lookup[r[mid_i]] = {
+                "team_1": r[t1_i],
+                "team_2": r[t2_i],
+                "exp_win_1": float(r[p1_i]),
+                "exp_win_2": float(r[p2_i]),
+            }
     return lookup
 
 
-def run_simulation(matches, model_probs, threshold):
-    bets = []
-    bankroll_history = [0.0]
-    peak = 0.0
-    max_drawdown = 0.0
+def load_matches_with_odds():
+    with open(METADATA_ODDS_PATH, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        fields = itemgetter(*(col[name] for name in MATCH_FIELDS))
+        market_i = col["team_1_market_prob"]
+        matches = [fields(row) for row in reader if row[market_i] != ""]
+    matches.sort(key=itemgetter(MATCH_FIELDS.index("date")))
+    return matches
+
 
-    for match in matches:
-        mid = match["match_id"]
-        if match["team_1_market_prob"] == "" or mid not in model_probs:
+def build_match_arrays(matches, model_probs):
+    t1_edge, t2_edge, t1_odds, t2_odds, t1_won = [], [], [], [], []
+
+    for mid, _, meta_t1, meta_t2, winner, t1_market, t2_market, t1_price, t2_price in matches:
+        if mid not in model_probs:
             continue
 
-        t1_market = float(match["team_1_market_prob"])
-        t2_market = float(match["team_2_market_prob"])
-        t1_odds = float(match["team_1_odds"])
-        t2_odds = float(match["team_2_odds"])
-        winner = match["winner"]
-        if not winner or winner not in (match["team_1"], match["team_2"]):
+        if not winner or winner not in (meta_t1, meta_t2):
             continue
 
         mp = model_probs[mid]
-        meta_t1 = match["team_1"]
-        meta_t2 = match["team_2"]
 
         if mp["team_1"] == meta_t1 and mp["team_2"] == meta_t2:
             model_prob_t1 = mp["exp_win_1"]
@@ -63,38 +75,33 @@ def run_simulation(matches, model_probs, threshold):
         else:
             continue
 
-        t1_edge = model_prob_t1 - t1_market
-        t2_edge = model_prob_t2 - t2_market
+        t1_edge.append(model_prob_t1 - float(t1_market))
+        t2_edge.append(model_prob_t2 - float(t2_market))
+        t1_odds.append(float(t1_price))
+        t2_odds.append(float(t2_price))
+        t1_won.append(winner == meta_t1)
 
-        bet_team = None
-        bet_odds = None
-        if t1_edge >= threshold and t1_edge >= t2_edge:
-            bet_team = meta_t1
-            bet_odds = t1_odds
-        elif t2_edge >= threshold:
-            bet_team = meta_t2
-            bet_odds = t2_odds
+    return {
+        "t1_edge": np.array(t1_edge, dtype=np.float64),
+        "t2_edge": np.array(t2_edge, dtype=np.float64),
+        "t1_odds": np.array(t1_odds, dtype=np.float64),
+        "t2_odds": np.array(t2_odds, dtype=np.float64),
+        "t1_won": np.array(t1_won, dtype=bool),
+    }
 
-        if bet_team is None:
-            continue
 
-        won = (bet_team == winner)
-        pnl = (bet_odds - 1.0) if won else -1.0
-        bets.append({
-            "match_id": mid,
-            "bet_team": bet_team,
-            "odds": bet_odds,
-            "won": won,
-            "pnl": pnl,
-        })
-
-        cumulative = bankroll_history[-1] + pnl
-        bankroll_history.append(cumulative)
-        peak = max(peak, cumulative)
-        drawdown = peak - cumulative
-        max_drawdown = max(max_drawdown, drawdown)
-
-    total_bets = len(bets)
+def run_simulation(arrays, threshold):
+    t1_edge = arrays["t1_edge"]
+    bet_t1 = (t1_edge >= threshold) & (t1_edge >= arrays["t2_edge"])
+    bet_t2 = ~bet_t1 & (arrays["t2_edge"] >= threshold)
+    placed = bet_t1 | bet_t2
+
+    won = np.where(bet_t1, arrays["t1_won"], ~arrays["t1_won"])[placed]
+    odds = np.where(bet_t1, arrays["t1_odds"], arrays["t2_odds"])[placed]
+    pnls = np.where(won, odds - 1.0, -1.0)
+    wins = int(np.count_nonzero(won))
+
+    total_bets = len(pnls)
     if total_bets == 0:
         return {
             "threshold": threshold,
@@ -104,10 +111,13 @@ def run_simulation(matches, model_probs, threshold):
             "max_drawdown": 0, "max_drawdown_pct": 0,
         }
 
-    wins = sum(1 for b in bets if b["won"])
+    cumulative = np.cumsum(pnls)
+    peak = np.maximum(np.maximum.accumulate(cumulative), 0.0)
+    max_drawdown = float((peak - cumulative).max())
+
     losses = total_bets - wins
     total_staked = total_bets
-    total_return = round(sum(b["pnl"] for b in bets) + total_staked, 2)
+    total_return = round(float(cumulative[-1]) + total_staked, 2)
     profit = round(total_return - total_staked, 2)
     roi = round((profit / total_staked) * 100, 2) if total_staked > 0 else 0
     win_rate = round(wins / total_bets, 4)
@@ -131,20 +141,17 @@ def run_simulation(matches, model_probs, threshold):
 def edge_simulation():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(METADATA_ODDS_PATH, "r", encoding="utf-8") as f:
-        all_matches = list(csv.DictReader(f))
-
-    matches_with_odds = [m for m in all_matches if m.get("team_1_market_prob", "") != ""]
-    matches_with_odds.sort(key=lambda m: m["date"])
+    matches_with_odds = load_matches_with_odds()
 
     model_probs = load_model_probs()
+    arrays = build_match_arrays(matches_with_odds, model_probs)
 
     print("\n=== edge_simulation.py Summary ===")
     print(f"  Total matches with odds    : {len(matches_with_odds)}")
 
     results = []
     for threshold in THRESHOLDS:
-        result = run_simulation(matches_with_odds, model_probs, threshold)
+        result = run_simulation(arrays, threshold)
         results.append(result)
 
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
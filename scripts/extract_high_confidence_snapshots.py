@@ -1,6 +1,7 @@
-import csv
 import os
-from collections import defaultdict
+
+import numpy as np
+import pandas as pd
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -11,6 +12,24 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "high_confidence_snapshots_85_plus.csv
 
 THRESHOLD = 0.85
 
+INPUT_COLUMNS = [
+    "match_id", "innings_number", "over_number", "runs_so_far", "wickets_so_far",
+    "balls_remaining", "target", "required_run_rate", "batting_team", "bowling_team",
+    "eventual_winner", "elo_rating_difference",
+]
+BUCKET_FIELDS = ["over_bucket", "wickets_bucket", "run_pressure_bucket", "elo_diff_bucket"]
+
+OVER_LABELS = ["1-3", "4-6", "7-10", "11-15", "16-20"]
+WICKETS_LABELS = ["0-1", "2-3", "4-6", "7+"]
+PRESSURE_LABELS = ["first_innings", "very_low", "low", "neutral", "high", "very_high"]
+ELO_LABELS = ["strong_disadvantage", "moderate_disadvantage", "neutral",
+              "moderate_advantage", "strong_advantage"]
+TABLE_SHAPE = (len(OVER_LABELS), len(WICKETS_LABELS), len(PRESSURE_LABELS), len(ELO_LABELS))
+
+OVER_BINS = [3, 6, 10, 15]
+WICKETS_BINS = [1, 3, 6]
+PRESSURE_BINS = [-4, -1, 1, 4]
+
 OUTPUT_FIELDS = [
     "match_id", "season", "date", "innings_number", "over_number",
     "batting_team", "bowling_team", "final_stabilized_probability",
@@ -19,159 +38,84 @@ OUTPUT_FIELDS = [
 
 
 def over_bucket(over_num):
-    over_num = int(over_num)
-    if over_num <= 3:
-        return "1-3"
-    elif over_num <= 6:
-        return "4-6"
-    elif over_num <= 10:
-        return "7-10"
-    elif over_num <= 15:
-        return "11-15"
-    else:
-        return "16-20"
+    return np.searchsorted(OVER_BINS, over_num)
 
 
 def wickets_bucket(wickets):
-    wickets = int(wickets)
-    if wickets <= 1:
-        return "0-1"
-    elif wickets <= 3:
-        return "2-3"
-    elif wickets <= 6:
-        return "4-6"
-    else:
-        return "7+"
-
-
-def run_pressure_bucket(row):
-    innings = int(row["innings_number"])
-    if innings == 1:
-        return "first_innings"
-
-    target = row.get("target", "")
-    balls_rem = row.get("balls_remaining", "")
-    runs_so_far = row.get("runs_so_far", "")
-    over_num = row.get("over_number", "")
-
-    if target == "" or balls_rem == "" or runs_so_far == "" or over_num == "":
-        return "first_innings"
-
-    target = float(target)
-    balls_rem = float(balls_rem)
-    runs_so_far = float(runs_so_far)
-    over_num = float(over_num)
-
-    if over_num > 0:
-        current_rr = (runs_so_far / (over_num * 6)) * 6
-    else:
-        current_rr = 0.0
-
-    rrr_val = float(row.get("required_run_rate", 0))
-    pressure = rrr_val - current_rr
-
-    if pressure <= -4:
-        return "very_low"
-    elif pressure <= -1:
-        return "low"
-    elif pressure <= 1:
-        return "neutral"
-    elif pressure <= 4:
-        return "high"
-    else:
-        return "very_high"
+    return np.searchsorted(WICKETS_BINS, wickets)
+
+
+def run_pressure_bucket(df):
+    over_num = df["over_number"].to_numpy(dtype=float)
+    runs_so_far = df["runs_so_far"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_rr = np.where(over_num > 0, (runs_so_far / (over_num * 6)) * 6, 0.0)
+    pressure = df["required_run_rate"].to_numpy(dtype=float) - current_rr
+
+    first_innings = ((df["innings_number"].to_numpy() == 1)
+                     | df[["target", "balls_remaining", "runs_so_far", "over_number"]].isna().any(axis=1).to_numpy())
+    return np.where(first_innings, 0, np.searchsorted(PRESSURE_BINS, pressure) + 1)
 
 
 def elo_diff_bucket(elo_diff):
-    if elo_diff == "":
-        return "neutral"
-    elo_diff = float(elo_diff)
-    if elo_diff > 75:
-        return "strong_advantage"
-    elif elo_diff > 25:
-        return "moderate_advantage"
-    elif elo_diff >= -25:
-        return "neutral"
-    elif elo_diff >= -75:
-        return "moderate_disadvantage"
-    else:
-        return "strong_disadvantage"
+    code = np.searchsorted([-75, -25], elo_diff, side="right") + np.searchsorted([25, 75], elo_diff)
+    return np.where(np.isnan(elo_diff), ELO_LABELS.index("neutral"), code)
+
+
+def read_processed(path, columns, **csv_kwargs):
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet_path, columns=columns, engine="pyarrow")
+    return pd.read_csv(path, usecols=columns, **csv_kwargs)
 
 
 def load_stabilized_model():
-    with open(STABILIZED_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    lookup = {}
-    for r in rows:
-        key = (r["over_bucket"], r["wickets_bucket"], r["run_pressure_bucket"], r["elo_diff_bucket"])
-        lookup[key] = float(r["final_stabilized_probability"])
-    return lookup
+    model = read_processed(STABILIZED_PATH, BUCKET_FIELDS + ["final_stabilized_probability"],
+                           float_precision="round_trip")
+    codes = tuple(
+        model[field].map({label: i for i, label in enumerate(labels)}).to_numpy()
+        for field, labels in zip(BUCKET_FIELDS, (OVER_LABELS, WICKETS_LABELS,
+                                                 PRESSURE_LABELS, ELO_LABELS))
+    )
+    table = np.full(int(np.prod(TABLE_SHAPE)), np.nan)
+    table[np.ravel_multi_index(codes, TABLE_SHAPE)] = model["final_stabilized_probability"].to_numpy()
+    return table
 
 
 def load_match_dates():
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    lookup = {}
-    for r in rows:
-        lookup[r["match_id"]] = {"date": r["date"], "season": r["season"]}
-    return lookup
+    return read_processed(METADATA_PATH, ["match_id", "date", "season"],
+                          dtype={"date": str, "season": str}, keep_default_na=False)
 
 
 def extract_high_confidence():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    model_lookup = load_stabilized_model()
+    model_table = load_stabilized_model()
     match_info = load_match_dates()
 
-    with open(ENRICHED_PATH, "r", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
-
-    output_rows = []
-    total_2020 = 0
-
-    for row in all_rows:
-        mid = row["match_id"]
-        info = match_info.get(mid, {})
-        date = info.get("date", "")
-        if date < "2020-01-01":
-            continue
-        total_2020 += 1
-
-        ob = over_bucket(row["over_number"])
-        wb = wickets_bucket(row["wickets_so_far"])
-        rpb = run_pressure_bucket(row)
-        edb = elo_diff_bucket(row.get("elo_rating_difference", ""))
-
-        key = (ob, wb, rpb, edb)
-        prob = model_lookup.get(key)
-        if prob is None:
-            continue
-
-        if prob >= THRESHOLD:
-            output_rows.append({
-                "match_id": mid,
-                "season": info.get("season", row.get("season", "")),
-                "date": date,
-                "innings_number": row["innings_number"],
-                "over_number": row["over_number"],
-                "batting_team": row["batting_team"],
-                "bowling_team": row["bowling_team"],
-                "final_stabilized_probability": round(prob, 6),
-                "eventual_winner": row["eventual_winner"],
-            })
-
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(output_rows)
-
-    unique_matches = len(set(r["match_id"] for r in output_rows))
-    avg_prob = (sum(float(r["final_stabilized_probability"]) for r in output_rows) / len(output_rows)
-                if output_rows else 0)
+    rows = read_processed(ENRICHED_PATH, INPUT_COLUMNS, float_precision="round_trip")
+    match_info = match_info[match_info["date"] >= "2020-01-01"]
+    rows = rows.merge(match_info, on="match_id", how="inner")
+    total_2020 = len(rows)
+
+    bucket = np.ravel_multi_index((
+        over_bucket(rows["over_number"].to_numpy()),
+        wickets_bucket(rows["wickets_so_far"].to_numpy()),
+        run_pressure_bucket(rows),
+        elo_diff_bucket(rows["elo_rating_difference"].to_numpy(dtype=float)),
+    ), TABLE_SHAPE)
+    rows["final_stabilized_probability"] = model_table[bucket]
+
+    output = rows[rows["final_stabilized_probability"] >= THRESHOLD].copy()
+    output["final_stabilized_probability"] = output["final_stabilized_probability"].round(6)
+    output.to_csv(OUTPUT_PATH, columns=OUTPUT_FIELDS, index=False, lineterminator="\r\n")
+
+    unique_matches = output["match_id"].nunique()
+    avg_prob = output["final_stabilized_probability"].mean() if len(output) else 0
 
     print(f"\n=== extract_high_confidence_snapshots.py ===")
     print(f"  Total 2020+ snapshots      : {total_2020}")
-    print(f"  Snapshots >= {THRESHOLD:.0%}        : {len(output_rows)}")
+    print(f"  Snapshots >= {THRESHOLD:.0%}        : {len(output)}")
     print(f"  Unique matches involved    : {unique_matches}")
     print(f"  Avg probability            : {avg_prob:.4f}")
     print(f"  Output                     : {OUTPUT_PATH}")
@@ -2,9 +2,21 @@ import csv
 import json
 import os
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
 import requests
 
+from odds_api import (
+    BASE_URL, MARKET, MAX_WORKERS, ODDS_FORMAT, RATE_LIMITER, REGION,
+    SESSION, load_cached_response, parse_json, save_cached_response,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 METADATA_PATH = os.path.join(PROCESSED_DIR, "match_metadata.csv")
@@ -12,18 +24,16 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "historical_odds_raw.csv")
 DATES_CACHE_PATH = os.path.join(PROCESSED_DIR, "odds_fetch_dates_done.json")
 
 API_KEY = os.environ.get("ODDS_API_KEY", "")
-BASE_URL = "https://api.the-odds-api.com/v4/historical/sports/cricket_ipl/odds"
 BOOKMAKER = "pinnacle"
-REGION = "eu"
-MARKET = "h2h"
-ODDS_FORMAT = "decimal"
-SLEEP_BETWEEN_CALLS = 0.5
+DATES_SAVE_INTERVAL = 10
 
 OUTPUT_FIELDS = [
     "match_id", "date", "team_1", "team_2",
     "bookmaker_name", "team_1_odds", "team_2_odds", "snapshot_timestamp"
 ]
 
+MATCH_FIELDS = ["match_id", "date", "team_1", "team_2"]
+
 TEAM_NAME_MAP = {
     "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
     "Delhi Daredevils": "Delhi Capitals",
@@ -32,38 +42,49 @@ TEAM_NAME_MAP = {
 }
 
 
-def normalize_team(name):
-    return TEAM_NAME_MAP.get(name, name)
-
-
 def load_matches(filepath):
     with open(filepath, "r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        fields = itemgetter(*(col[name] for name in MATCH_FIELDS))
+        return [fields(row) for row in reader]
 
 
 def load_existing_results():
     if not os.path.exists(OUTPUT_PATH):
         return set(), []
     with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    existing_ids = {r["match_id"] for r in rows}
+        reader = csv.reader(f)
+        mid_i = next(reader).index("match_id")
+        rows = list(reader)
+    existing_ids = {r[mid_i] for r in rows}
     return existing_ids, rows
 
 
 def load_dates_done():
     if not os.path.exists(DATES_CACHE_PATH):
         return set()
-    with open(DATES_CACHE_PATH, "r") as f:
-        return set(json.load(f))
+    with open(DATES_CACHE_PATH, "rb") as f:
+        return set(parse_json(f.read()))
 
 
 def save_dates_done(dates_done):
-    with open(DATES_CACHE_PATH, "w") as f:
-        json.dump(sorted(dates_done), f)
+    if orjson is not None:
+        raw = orjson.dumps(sorted(dates_done))
+    else:
+        raw = json.dumps(sorted(dates_done)).encode()
+    tmp_path = DATES_CACHE_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, DATES_CACHE_PATH)
 
 
 def fetch_odds_for_date(date_str):
     snapshot_time = f"{date_str}T13:30:00Z"
+    cached = load_cached_response(snapshot_time)
+    if cached is not None:
+        return cached, snapshot_time, True
+
     params = {
         "apiKey": API_KEY,
         "regions": REGION,
@@ -71,42 +92,49 @@ def fetch_odds_for_date(date_str):
         "oddsFormat": ODDS_FORMAT,
         "date": snapshot_time,
     }
-    resp = requests.get(BASE_URL, params=params, timeout=30)
+    RATE_LIMITER.acquire()
+    resp = SESSION.get(BASE_URL, params=params, timeout=30)
     resp.raise_for_status()
-    return resp.json(), snapshot_time
+    save_cached_response(snapshot_time, resp.content)
+    return parse_json(resp.content), snapshot_time, False
 
 
-def find_pinnacle_odds(events_data, team_1, team_2):
+def fetch_date(date_str):
+    try:
+        data, snapshot_ts, from_cache = fetch_odds_for_date(date_str)
+        return date_str, data.get("data", []), snapshot_ts, from_cache, None
+    except Exception as e:
+        return date_str, None, None, False, e
+
+
+def index_pinnacle_odds(events_data):
+    team_name = TEAM_NAME_MAP.get
+    bookmaker_key = BOOKMAKER
+    market_key = MARKET
+    odds_by_pair = {}
     for event in events_data:
-        event_home = normalize_team(event.get("home_team", ""))
-        event_away = normalize_team(event.get("away_team", ""))
-
-        teams_match = (
-            (event_home == team_1 and event_away == team_2) or
-            (event_home == team_2 and event_away == team_1)
-        )
-        if not teams_match:
-            continue
-
-        for bm in event.get("bookmakers", []):
-            if bm["key"] != BOOKMAKER:
+        event_get = event.get
+        home = event_get("home_team", "")
+        away = event_get("away_team", "")
+        pair = frozenset((team_name(home, home), team_name(away, away)))
+        for bm in event_get("bookmakers", []):
+            if bm["key"] != bookmaker_key:
                 continue
             for market in bm.get("markets", []):
-                if market["key"] != MARKET:
+                if market["key"] != market_key:
                     continue
-                outcomes = {normalize_team(o["name"]): o["price"] for o in market["outcomes"]}
-                t1_odds = outcomes.get(team_1)
-                t2_odds = outcomes.get(team_2)
-                if t1_odds and t2_odds:
-                    return bm["title"], t1_odds, t2_odds
-    return None, None, None
+                outcomes = {team_name(o["name"], o["name"]): o["price"] for o in market["outcomes"]}
+                odds_by_pair.setdefault(pair, []).append((bm["title"], outcomes))
+    return odds_by_pair
 
 
-def save_rows(rows):
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(rows)
+def find_pinnacle_odds(odds_by_pair, team_1, team_2):
+    for title, outcomes in odds_by_pair.get(frozenset((team_1, team_2)), ()):
+        t1_odds = outcomes.get(team_1)
+        t2_odds = outcomes.get(team_2)
+        if t1_odds and t2_odds:
+            return title, t1_odds, t2_odds
+    return None, None, None
 
 
 def fetch_historical_odds():
@@ -117,13 +145,13 @@ def fetch_historical_odds():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
     matches = load_matches(METADATA_PATH)
 
-    matches_2020_plus = [m for m in matches if m["date"] >= "2020-01-01"]
-    matches_2020_plus.sort(key=lambda m: m["date"])
+    matches_2020_plus = [m for m in matches if m[1] >= "2020-01-01"]
+    matches_2020_plus.sort(key=itemgetter(1))
 
     existing_ids, rows = load_existing_results()
     dates_done = load_dates_done()
 
-    all_dates = sorted(set(m["date"] for m in matches_2020_plus))
+    all_dates = sorted(set(m[1] for m in matches_2020_plus))
     remaining_dates = sorted(set(all_dates) - dates_done)
 
     print(f"\n=== fetch_historical_odds.py ===")
@@ -143,58 +171,58 @@ def fetch_historical_odds():
     skipped_no_match = 0
     api_errors = 0
     api_calls = 0
+    cache_hits = 0
+
+    write_header = not os.path.exists(OUTPUT_PATH) or os.path.getsize(OUTPUT_PATH) == 0
+    with open(OUTPUT_PATH, "a", newline="", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(OUTPUT_FIELDS)
+
+        for date_str, events_data, snapshot_ts, from_cache, error in pool.map(fetch_date, remaining_dates):
+            if isinstance(error, requests.exceptions.HTTPError):
+                print(f"  HTTP error for date {date_str}: {error}", file=sys.stderr)
+                api_errors += 1
+                continue
+            if error is not None:
+                print(f"  Error for date {date_str}: {error}", file=sys.stderr)
+                api_errors += 1
+                continue
 
-    for date_str in remaining_dates:
-        try:
-            data, snapshot_ts = fetch_odds_for_date(date_str)
-            events_data = data.get("data", [])
-            api_calls += 1
-            print(f"  API call #{api_calls}: date={date_str} events={len(events_data)}")
-            time.sleep(SLEEP_BETWEEN_CALLS)
-        except requests.exceptions.HTTPError as e:
-            print(f"  HTTP error for date {date_str}: {e}", file=sys.stderr)
-            api_errors += 1
-            time.sleep(SLEEP_BETWEEN_CALLS)
-            continue
-        except Exception as e:
-            print(f"  Error for date {date_str}: {e}", file=sys.stderr)
-            api_errors += 1
-            time.sleep(SLEEP_BETWEEN_CALLS)
-            continue
-
-        date_matches = [m for m in matches_2020_plus
-                        if m["date"] == date_str and m["match_id"] not in existing_ids]
-
-        for match in date_matches:
-            team_1 = match["team_1"]
-            team_2 = match["team_2"]
-            match_id = match["match_id"]
-
-            bm_name, t1_odds, t2_odds = find_pinnacle_odds(events_data, team_1, team_2)
-
-            if t1_odds is not None and t2_odds is not None:
-                row = {
-                    "match_id": match_id,
-                    "date": date_str,
-                    "team_1": team_1,
-                    "team_2": team_2,
-                    "bookmaker_name": bm_name,
-                    "team_1_odds": t1_odds,
-                    "team_2_odds": t2_odds,
-                    "snapshot_timestamp": snapshot_ts,
-                }
-                rows.append(row)
-                existing_ids.add(match_id)
-                found_this_run += 1
+            if from_cache:
+                cache_hits += 1
+                print(f"  Cached: date={date_str} events={len(events_data)}")
             else:
-                if events_data:
-                    skipped_no_pinnacle += 1
+                api_calls += 1
+                print(f"  API call #{api_calls}: date={date_str} events={len(events_data)}")
+
+            odds_by_pair = index_pinnacle_odds(events_data)
+            date_matches = [m for m in matches_2020_plus
+                            if m[1] == date_str and m[0] not in existing_ids]
+
+            for match_id, _, team_1, team_2 in date_matches:
+                bm_name, t1_odds, t2_odds = find_pinnacle_odds(odds_by_pair, team_1, team_2)
+
+                if t1_odds is not None and t2_odds is not None:
+                    row = (match_id, date_str, team_1, team_2,
+                           bm_name, t1_odds, t2_odds, snapshot_ts)
+                    rows.append(row)
+                    writer.writerow(row)
+                    existing_ids.add(match_id)
+                    found_this_run += 1
                 else:
-                    skipped_no_match += 1
+                    if events_data:
+                        skipped_no_pinnacle += 1
+                    else:
+                        skipped_no_match += 1
+
+            dates_done.add(date_str)
+            if (api_calls + cache_hits) % DATES_SAVE_INTERVAL == 0:
+                out.flush()
+                save_dates_done(dates_done)
 
-        dates_done.add(date_str)
-        save_rows(rows)
-        save_dates_done(dates_done)
+    save_dates_done(dates_done)
 
     print(f"\n  Results:")
     print(f"    Total matches with Pinnacle odds  : {len(rows)}")
@@ -203,6 +231,7 @@ def fetch_historical_odds():
     print(f"    Skipped (no match data)           : {skipped_no_match}")
     print(f"    API errors                        : {api_errors}")
     print(f"    API calls made (this run)         : {api_calls}")
+    print(f"    Cache hits (this run)             : {cache_hits}")
     print(f"    Dates processed total             : {len(dates_done)}")
     print(f"    Output                            : {OUTPUT_PATH}")
 
@@ -1,10 +1,17 @@
 import csv
-import json
 import os
 import sys
-import time
-import requests
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, groupby
+from operator import itemgetter
+
+import numpy as np
+
+from odds_api import (
+    BASE_URL, MARKET, MAX_WORKERS, ODDS_FORMAT, RATE_LIMITER, REGION,
+    SESSION, load_cached_response, parse_json, save_cached_response,
+)
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -13,11 +20,6 @@ METADATA_PATH = os.path.join(PROCESSED_DIR, "match_metadata.csv")
 OUTPUT_PATH = os.path.join(PROCESSED_DIR, "high_confidence_inplay_odds.csv")
 
 API_KEY = os.environ.get("ODDS_API_KEY", "")
-BASE_URL = "https://api.the-odds-api.com/v4/historical/sports/cricket_ipl/odds"
-REGION = "eu"
-MARKET = "h2h"
-ODDS_FORMAT = "decimal"
-SLEEP_BETWEEN_CALLS = 0.5
 MAX_API_CALLS = 500
 
 BOOKMAKER_PRIORITY = ["pinnacle", "betfair_ex_eu", "sport888", "williamhill",
@@ -33,6 +35,12 @@ OUTPUT_FIELDS = [
     "edge", "fetch_timestamp", "bookmaker_used"
 ]
 
+SNAPSHOT_FIELDS = [
+    "match_id", "date", "innings_number", "over_number",
+    "batting_team", "bowling_team",
+    "final_stabilized_probability", "eventual_winner"
+]
+
 TEAM_NAME_MAP = {
     "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
     "Delhi Daredevils": "Delhi Capitals",
@@ -43,25 +51,26 @@ TEAM_NAME_MAP = {
 MINUTES_PER_OVER = 4
 INNINGS_BREAK_MINUTES = 20
 
+def read_columns(path, fields):
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        get = itemgetter(*(col[name] for name in fields))
+        return [get(row) for row in reader]
 
-def normalize_team(name):
-    return TEAM_NAME_MAP.get(name, name)
-
-
-def determine_match_slot(match_id, date_str, metadata_by_date):
-    day_matches = metadata_by_date.get(date_str, [])
-    if len(day_matches) <= 1:
-        return 14
-    sorted_matches = sorted(day_matches, key=lambda m: int(m["match_id"]))
-    if str(match_id) == str(sorted_matches[0]["match_id"]):
-        return 10
-    return 14
 
+def build_match_slots(metadata):
+    slot_by_match = {}
+    for date_str, day_matches in groupby(metadata, key=itemgetter(0)):
+        day_match_ids = [m[1] for m in day_matches]
+        for match_id in day_match_ids:
+            slot_by_match[(date_str, match_id)] = 14
+        if len(day_match_ids) > 1:
+            slot_by_match[(date_str, day_match_ids[0])] = 10
+    return slot_by_match
 
-def estimate_timestamp(date_str, innings_number, over_number, start_hour):
-    innings = int(innings_number)
-    over = int(over_number)
 
+def estimate_timestamp(date_str, innings, over, start_hour):
     if innings == 1:
         minutes_offset = over * MINUTES_PER_OVER
     else:
@@ -73,14 +82,26 @@ def estimate_timestamp(date_str, innings_number, over_number, start_hour):
     return f"{date_str}T{hours:02d}:{mins:02d}:00Z"
 
 
-def save_rows(rows):
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(rows)
+def load_done_keys():
+    done_keys = set()
+    n_rows = 0
+    if not os.path.exists(OUTPUT_PATH):
+        return done_keys, n_rows
+    with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        mid_i, inn_i = col["match_id"], col["innings_number"]
+        for row in reader:
+            done_keys.add((row[mid_i], int(row[inn_i])))
+            n_rows += 1
+    return done_keys, n_rows
 
 
 def fetch_odds_snapshot(timestamp):
+    cached = load_cached_response(timestamp)
+    if cached is not None:
+        return cached, True
+
     params = {
         "apiKey": API_KEY,
         "regions": REGION,
@@ -88,42 +109,63 @@ def fetch_odds_snapshot(timestamp):
         "oddsFormat": ODDS_FORMAT,
         "date": timestamp,
     }
-    resp = requests.get(BASE_URL, params=params, timeout=30)
+    RATE_LIMITER.acquire()
+    resp = SESSION.get(BASE_URL, params=params, timeout=30)
     resp.raise_for_status()
-    return resp.json()
+    save_cached_response(timestamp, resp.content)
+    return parse_json(resp.content), False
 
 
-def find_best_bookmaker_for_teams(events, batting_team, bowling_team):
+def fetch_events_index(timestamp):
+    try:
+        data, from_cache = fetch_odds_snapshot(timestamp)
+        return build_events_index(data.get("data", [])), from_cache, None
+    except Exception as e:
+        return None, False, e
+
+
+def bookmaker_outcomes(bm, teams):
+    team_name = TEAM_NAME_MAP.get
+    found = None
+    for market in bm.get("markets", []):
+        if market["key"] != MARKET:
+            continue
+        outcomes = {}
+        for o in market["outcomes"]:
+            name = o["name"]
+            norm_name = team_name(name, name)
+            if norm_name in teams:
+                outcomes[norm_name] = o["price"]
+        if len(outcomes) == len(teams):
+            found = outcomes
+    return found
+
+
+def build_events_index(events):
+    team_name = TEAM_NAME_MAP.get
+    events_index = {}
     for event in events:
-        home_norm = normalize_team(event.get("home_team", ""))
-        away_norm = normalize_team(event.get("away_team", ""))
+        event_get = event.get
+        home = event_get("home_team", "")
+        away = event_get("away_team", "")
 
-        teams = {home_norm, away_norm}
-        if batting_team not in teams or bowling_team not in teams:
+        teams = frozenset((team_name(home, home), team_name(away, away)))
+        if teams in events_index:
             continue
 
-        bookmaker_odds = {}
-        for bm in event.get("bookmakers", []):
-            for market in bm.get("markets", []):
-                if market["key"] != MARKET:
-                    continue
-                outcomes = {}
-                for o in market["outcomes"]:
-                    norm_name = normalize_team(o["name"])
-                    if norm_name in (batting_team, bowling_team):
-                        outcomes[norm_name] = o["price"]
-                if batting_team in outcomes and bowling_team in outcomes:
-                    bookmaker_odds[bm["key"]] = outcomes
+        bm_by_key = {bm["key"]: bm for bm in event_get("bookmakers", [])}
+        for bm_key in chain(BOOKMAKER_PRIORITY, bm_by_key):
+            bm = bm_by_key.get(bm_key)
+            odds = bookmaker_outcomes(bm, teams) if bm is not None else None
+            if odds is not None:
+                events_index[teams] = (odds, bm_key)
+                break
 
-        for pref in BOOKMAKER_PRIORITY:
-            if pref in bookmaker_odds:
-                return bookmaker_odds[pref], pref
+    return events_index
 
-        if bookmaker_odds:
-            key = next(iter(bookmaker_odds))
-            return bookmaker_odds[key], key
 
-    return None, None
+def find_best_bookmaker_for_teams(events_index, batting_team, bowling_team):
+    return events_index.get(frozenset((batting_team, bowling_team)), (None, None))
 
 
 def fetch_inplay_pilot():
@@ -133,130 +175,134 @@ def fetch_inplay_pilot():
 
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        snapshots = list(csv.DictReader(f))
+    snapshots = [(mid, date_str, int(inn), int(over), bat, bowl, float(prob), winner)
+                 for mid, date_str, inn, over, bat, bowl, prob, winner
+                 in read_columns(INPUT_PATH, SNAPSHOT_FIELDS)]
 
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        metadata = list(csv.DictReader(f))
+    metadata = read_columns(METADATA_PATH, ["date", "match_id"])
+    metadata.sort(key=lambda m: (m[0], int(m[1])))
+    slot_by_match = build_match_slots(metadata)
 
-    metadata_by_date = defaultdict(list)
-    for m in metadata:
-        metadata_by_date[m["date"]].append(m)
-
-    existing_rows = []
-    done_keys = set()
-    if os.path.exists(OUTPUT_PATH):
-        with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
-            existing_rows = list(csv.DictReader(f))
-        done_keys = {(r["match_id"], r["innings_number"]) for r in existing_rows}
+    done_keys, existing_count = load_done_keys()
 
     match_innings_groups = defaultdict(list)
     for s in snapshots:
-        key = (s["match_id"], s["innings_number"])
+        key = (s[0], s[2])
         if key not in done_keys:
             match_innings_groups[key].append(s)
 
     sorted_groups = sorted(match_innings_groups.keys(),
-                           key=lambda k: match_innings_groups[k][0]["date"],
+                           key=lambda k: match_innings_groups[k][0][1],
                            reverse=True)
 
     print(f"\n=== fetch_inplay_pinnacle_pilot.py (optimized) ===")
     print(f"  Total high-confidence snapshots : {len(snapshots)}")
     print(f"  Unique match-innings groups     : {len(sorted_groups)}")
     print(f"  Strategy: 1 API call per match-innings (representative over)")
-    print(f"  Already fetched (resuming)     : {len(done_keys)} groups ({len(existing_rows)} rows)")
+    print(f"  Already fetched (resuming)     : {len(done_keys)} groups ({existing_count} rows)")
     print(f"  Bookmaker priority: {', '.join(BOOKMAKER_PRIORITY[:4])}")
 
-    rows = list(existing_rows)
     api_calls = 0
+    cache_hits = 0
     found = 0
     not_found = 0
     bookmaker_counts = defaultdict(int)
 
-    for key in sorted_groups:
-        if api_calls >= MAX_API_CALLS:
-            print(f"  Reached API call limit ({MAX_API_CALLS})")
-            break
+    plan = []
+    unique_timestamps = {}
+    limit_reached = False
+    for mid, inn in sorted_groups:
+        group_snaps = match_innings_groups[(mid, inn)]
+        date_str = group_snaps[0][1]
+        start_hour = slot_by_match.get((date_str, mid), 14)
 
-        mid, inn = key
-        group_snaps = match_innings_groups[key]
-        sample = group_snaps[0]
-        date_str = sample["date"]
-        bat = sample["batting_team"]
-        bowl = sample["bowling_team"]
-
-        start_hour = determine_match_slot(mid, date_str, metadata_by_date)
-
-        overs = sorted(set(int(s["over_number"]) for s in group_snaps))
+        overs = sorted(set(s[3] for s in group_snaps))
         median_over = overs[len(overs) // 2]
 
         ts = estimate_timestamp(date_str, inn, median_over, start_hour)
-
-        try:
-            data = fetch_odds_snapshot(ts)
-            events = data.get("data", [])
-            api_calls += 1
-            time.sleep(SLEEP_BETWEEN_CALLS)
-        except Exception as e:
-            print(f"  Error {ts}: {e}", file=sys.stderr)
-            api_calls += 1
-            time.sleep(1.0)
-            continue
-
-        odds, bm_used = find_best_bookmaker_for_teams(events, bat, bowl)
-
-        if odds and bat in odds and bowl in odds:
-            bat_odds = odds[bat]
-            bowl_odds = odds[bowl]
-            bat_imp = 1.0 / bat_odds
-            bowl_imp = 1.0 / bowl_odds
-            total_imp = bat_imp + bowl_imp
-            bat_market_prob = bat_imp / total_imp
-            bowl_market_prob = bowl_imp / total_imp
-
-            bookmaker_counts[bm_used] += 1
-
-            for snap in group_snaps:
-                model_prob = float(snap["final_stabilized_probability"])
-                edge = model_prob - bat_market_prob
-
-                rows.append({
-                    "match_id": snap["match_id"],
-                    "date": snap["date"],
-                    "innings_number": snap["innings_number"],
-                    "over_number": snap["over_number"],
-                    "batting_team": bat,
-                    "bowling_team": bowl,
-                    "model_probability": round(model_prob, 6),
-                    "eventual_winner": snap["eventual_winner"],
-                    "market_team_1": bat,
-                    "market_team_2": bowl,
-                    "market_odds_1": bat_odds,
-                    "market_odds_2": bowl_odds,
-                    "market_prob_1": round(bat_market_prob, 6),
-                    "market_prob_2": round(bowl_market_prob, 6),
-                    "edge": round(edge, 6),
-                    "fetch_timestamp": ts,
-                    "bookmaker_used": bm_used,
-                })
-            found += len(group_snaps)
-            print(f"  Match {mid} inn {inn} ({date_str}): {bm_used} | "
-                  f"bat={bat_odds:.2f} bowl={bowl_odds:.2f} | {len(group_snaps)} snaps")
-        else:
-            not_found += len(group_snaps)
-            print(f"  Match {mid} inn {inn} ({date_str}): NO odds found | {len(group_snaps)} snaps skipped")
-
-        if api_calls % 50 == 0 and api_calls > 0:
-            save_rows(rows)
-            print(f"  Progress: {api_calls} API calls, {found} found, {not_found} not found")
-
-    save_rows(rows)
+        if ts not in unique_timestamps:
+            if len(unique_timestamps) >= MAX_API_CALLS:
+                limit_reached = True
+                break
+            unique_timestamps[ts] = None
+        plan.append((mid, inn, ts))
+
+    write_header = not os.path.exists(OUTPUT_PATH) or os.path.getsize(OUTPUT_PATH) == 0
+    with open(OUTPUT_PATH, "a", newline="", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(OUTPUT_FIELDS)
+
+        fetched = zip(unique_timestamps, pool.map(fetch_events_index, unique_timestamps))
+        responses = {}
+        for mid, inn, ts in plan:
+            group_snaps = match_innings_groups[(mid, inn)]
+            _, date_str, _, _, bat, bowl, _, _ = group_snaps[0]
+
+            if ts not in responses:
+                responses[ts] = next(fetched)[1]
+                if responses[ts][1]:
+                    cache_hits += 1
+                else:
+                    api_calls += 1
+            events_index, _, error = responses[ts]
+            if error is not None:
+                print(f"  Error {ts}: {error}", file=sys.stderr)
+                continue
+
+            odds, bm_used = find_best_bookmaker_for_teams(events_index, bat, bowl)
+
+            if odds and bat in odds and bowl in odds:
+                bat_odds = odds[bat]
+                bowl_odds = odds[bowl]
+                bat_imp = 1.0 / bat_odds
+                bowl_imp = 1.0 / bowl_odds
+                total_imp = bat_imp + bowl_imp
+                bat_market_prob = bat_imp / total_imp
+                bowl_market_prob = bowl_imp / total_imp
+
+                bookmaker_counts[bm_used] += 1
+
+                model_probs = np.fromiter((snap[6] for snap in group_snaps),
+                                          dtype=np.float64, count=len(group_snaps))
+                edges = np.round(model_probs - bat_market_prob, 6).tolist()
+                model_probs = np.round(model_probs, 6).tolist()
+                bat_prob_out = round(bat_market_prob, 6)
+                bowl_prob_out = round(bowl_market_prob, 6)
+
+                for snap, model_prob, edge in zip(group_snaps, model_probs, edges):
+                    snap_mid, snap_date, snap_inn, snap_over, _, _, _, winner = snap
+                    writer.writerow((
+                        snap_mid, snap_date, snap_inn, snap_over,
+                        bat, bowl,
+                        model_prob, winner,
+                        bat, bowl,
+                        bat_odds, bowl_odds,
+                        bat_prob_out, bowl_prob_out,
+                        edge, ts, bm_used,
+                    ))
+                out.flush()
+                found += len(group_snaps)
+                print(f"  Match {mid} inn {inn} ({date_str}): {bm_used} | "
+                      f"bat={bat_odds:.2f} bowl={bowl_odds:.2f} | {len(group_snaps)} snaps")
+            else:
+                not_found += len(group_snaps)
+                print(f"  Match {mid} inn {inn} ({date_str}): NO odds found | {len(group_snaps)} snaps skipped")
+
+            if (api_calls + cache_hits) % 50 == 0 and (api_calls + cache_hits) > 0:
+                print(f"  Progress: {api_calls} API calls, {cache_hits} cache hits, "
+                      f"{found} found, {not_found} not found")
+
+    if limit_reached:
+        print(f"  Reached API call limit ({MAX_API_CALLS})")
 
     print(f"\n  Results:")
     print(f"    API calls              : {api_calls}")
+    print(f"    Cache hits             : {cache_hits}")
     print(f"    Snapshots with odds    : {found}")
     print(f"    Snapshots without odds : {not_found}")
-    print(f"    Total rows in output   : {len(rows)}")
+    print(f"    Total rows in output   : {existing_count + found}")
     print(f"    Bookmaker breakdown    :")
     for bm, cnt in sorted(bookmaker_counts.items(), key=lambda x: -x[1]):
         print(f"      {bm}: {cnt} match-innings groups")
@@ -1,10 +1,17 @@
 import csv
-import json
 import os
 import sys
-import time
-import requests
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, groupby
+from operator import itemgetter
+
+import numpy as np
+
+from odds_api import (
+    BASE_URL, MARKET, MAX_WORKERS, ODDS_FORMAT, RATE_LIMITER, REGION,
+    RESPONSE_CACHE_DIR, SESSION, load_cached_response, parse_json, save_cached_response,
+)
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -14,11 +21,6 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "per_over_aligned_odds.csv")
 CACHE_PATH = os.path.join(PROCESSED_DIR, "per_over_odds_cache.json")
 
 API_KEY = os.environ.get("ODDS_API_KEY", "")
-BASE_URL = "https://api.the-odds-api.com/v4/historical/sports/cricket_ipl/odds"
-REGION = "eu"
-MARKET = "h2h"
-ODDS_FORMAT = "decimal"
-SLEEP_BETWEEN_CALLS = 0.3
 MAX_API_CALLS = 1500
 
 BOOKMAKER_PRIORITY = ["pinnacle", "betfair_ex_eu", "sport888", "williamhill",
@@ -34,6 +36,12 @@ OUTPUT_FIELDS = [
     "edge", "fetch_timestamp", "bookmaker_used"
 ]
 
+SNAPSHOT_FIELDS = [
+    "match_id", "date", "innings_number", "over_number",
+    "batting_team", "bowling_team",
+    "final_stabilized_probability", "eventual_winner"
+]
+
 TEAM_NAME_MAP = {
     "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
     "Delhi Daredevils": "Delhi Capitals",
@@ -45,58 +53,62 @@ MINUTES_PER_OVER = 4
 INNINGS_BREAK_MINUTES = 20
 
 
-def normalize_team(name):
-    return TEAM_NAME_MAP.get(name, name)
+def read_columns(path, fields):
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        get = itemgetter(*(col[name] for name in fields))
+        return [get(row) for row in reader]
 
 
-def determine_match_slot(match_id, date_str, metadata_by_date):
-    day_matches = metadata_by_date.get(date_str, [])
-    if len(day_matches) <= 1:
-        return 14
-    sorted_matches = sorted(day_matches, key=lambda m: int(m["match_id"]))
-    if str(match_id) == str(sorted_matches[0]["match_id"]):
-        return 10
-    return 14
+def build_match_slots(metadata):
+    slot_by_match = {}
+    for date_str, day_matches in groupby(metadata, key=itemgetter(0)):
+        day_match_ids = [m[1] for m in day_matches]
+        for match_id in day_match_ids:
+            slot_by_match[(date_str, match_id)] = 14
+        if len(day_match_ids) > 1:
+            slot_by_match[(date_str, day_match_ids[0])] = 10
+    return slot_by_match
 
 
-def estimate_over_timestamp(date_str, innings_number, over_number, start_hour):
-    innings = int(innings_number)
-    over = int(over_number)
+def estimate_over_timestamps(dates, innings, overs, start_hours):
+    innings = np.asarray(innings, dtype=np.int64)
+    overs = np.asarray(overs, dtype=np.int64)
+    start_hours = np.asarray(start_hours, dtype=np.int64)
 
-    if innings == 1:
-        minutes_offset = over * MINUTES_PER_OVER
-    else:
-        minutes_offset = 20 * MINUTES_PER_OVER + INNINGS_BREAK_MINUTES + over * MINUTES_PER_OVER
+    minutes_offset = overs * MINUTES_PER_OVER + np.where(
+        innings == 1, 0, 20 * MINUTES_PER_OVER + INNINGS_BREAK_MINUTES)
+    total_minutes = start_hours * 60 + minutes_offset
 
-    total_minutes = start_hour * 60 + minutes_offset
-    hours = total_minutes // 60
-    mins = total_minutes % 60
-    return f"{date_str}T{hours:02d}:{mins:02d}:00Z"
+    clock_minutes, clock_idx = np.unique(total_minutes, return_inverse=True)
+    clock = [f"T{m // 60:02d}:{m % 60:02d}:00Z" for m in clock_minutes.tolist()]
+    return [date_str + clock[i] for date_str, i in zip(dates, clock_idx.tolist())]
 
 
-def save_rows(rows):
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(rows)
+def load_done_keys():
+    done_keys = set()
+    n_rows = 0
+    if not os.path.exists(OUTPUT_PATH):
+        return done_keys, n_rows
+    with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        mid_i, inn_i, over_i = col["match_id"], col["innings_number"], col["over_number"]
+        for row in reader:
+            done_keys.add((row[mid_i], int(row[inn_i]), int(row[over_i])))
+            n_rows += 1
+    return done_keys, n_rows
 
 
 def load_cache():
     if os.path.exists(CACHE_PATH):
-        with open(CACHE_PATH, "r") as f:
-            return json.load(f)
+        with open(CACHE_PATH, "rb") as f:
+            return parse_json(f.read())
     return {}
 
 
-def save_cache(cache):
-    with open(CACHE_PATH, "w") as f:
-        json.dump(cache, f)
-
-
-def fetch_odds_snapshot(timestamp, cache):
-    if timestamp in cache:
-        return cache[timestamp], False
-
+def fetch_odds_snapshot(timestamp):
     params = {
         "apiKey": API_KEY,
         "regions": REGION,
@@ -104,44 +116,62 @@ def fetch_odds_snapshot(timestamp, cache):
         "oddsFormat": ODDS_FORMAT,
         "date": timestamp,
     }
-    resp = requests.get(BASE_URL, params=params, timeout=30)
+    RATE_LIMITER.acquire()
+    resp = SESSION.get(BASE_URL, params=params, timeout=30)
     resp.raise_for_status()
-    result = resp.json()
-    cache[timestamp] = result
-    return result, True
+    save_cached_response(timestamp, resp.content)
+    return parse_json(resp.content)
+
 
+def fetch_snapshot_data(timestamp):
+    try:
+        return fetch_odds_snapshot(timestamp), None
+    except Exception as e:
+        return None, e
 
-def find_best_bookmaker_for_teams(events, batting_team, bowling_team):
+
+def bookmaker_outcomes(bm, teams):
+    team_name = TEAM_NAME_MAP.get
+    found = None
+    for market in bm.get("markets", []):
+        if market["key"] != MARKET:
+            continue
+        outcomes = {}
+        for o in market["outcomes"]:
+            name = o["name"]
+            norm_name = team_name(name, name)
+            if norm_name in teams:
+                outcomes[norm_name] = o["price"]
+        if len(outcomes) == len(teams):
+            found = outcomes
+    return found
+
+
+def build_events_index(events):
+    team_name = TEAM_NAME_MAP.get
+    events_index = {}
     for event in events:
-        home_norm = normalize_team(event.get("home_team", ""))
-        away_norm = normalize_team(event.get("away_team", ""))
+        event_get = event.get
+        home = event_get("home_team", "")
+        away = event_get("away_team", "")
 
-        teams = {home_norm, away_norm}
-        if batting_team not in teams or bowling_team not in teams:
+        teams = frozenset((team_name(home, home), team_name(away, away)))
+        if teams in events_index:
             continue
 
-        bookmaker_odds = {}
-        for bm in event.get("bookmakers", []):
-            for market in bm.get("markets", []):
-                if market["key"] != MARKET:
-                    continue
-                outcomes = {}
-                for o in market["outcomes"]:
-                    norm_name = normalize_team(o["name"])
-                    if norm_name in (batting_team, bowling_team):
-                        outcomes[norm_name] = o["price"]
-                if batting_team in outcomes and bowling_team in outcomes:
-                    bookmaker_odds[bm["key"]] = outcomes
+        bm_by_key = {bm["key"]: bm for bm in event_get("bookmakers", [])}
+        for bm_key in chain(BOOKMAKER_PRIORITY, bm_by_key):
+            bm = bm_by_key.get(bm_key)
+            odds = bookmaker_outcomes(bm, teams) if bm is not None else None
+            if odds is not None:
+                events_index[teams] = (odds, bm_key)
+                break
 
-        for pref in BOOKMAKER_PRIORITY:
-            if pref in bookmaker_odds:
-                return bookmaker_odds[pref], pref
+    return events_index
 
-        if bookmaker_odds:
-            key = next(iter(bookmaker_odds))
-            return bookmaker_odds[key], key
 
-    return None, None
+def find_best_bookmaker_for_teams(events_index, batting_team, bowling_team):
+    return events_index.get(frozenset((batting_team, bowling_team)), (None, None))
 
 
 def fetch_per_over():
@@ -151,30 +181,23 @@ def fetch_per_over():
 
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        snapshots = list(csv.DictReader(f))
+    snapshots = [(mid, date_str, int(inn), int(over), bat, bowl, float(prob), winner)
+                 for mid, date_str, inn, over, bat, bowl, prob, winner
+                 in read_columns(INPUT_PATH, SNAPSHOT_FIELDS)]
 
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        metadata = list(csv.DictReader(f))
+    metadata = read_columns(METADATA_PATH, ["date", "match_id"])
+    metadata.sort(key=lambda m: (m[0], int(m[1])))
+    slot_by_match = build_match_slots(metadata)
 
-    metadata_by_date = defaultdict(list)
-    for m in metadata:
-        metadata_by_date[m["date"]].append(m)
-
-    done_keys = set()
-    existing_rows = []
-    if os.path.exists(OUTPUT_PATH):
-        with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
-            existing_rows = list(csv.DictReader(f))
-        done_keys = {(r["match_id"], r["innings_number"], r["over_number"]) for r in existing_rows}
+    done_keys, existing_count = load_done_keys()
 
     todo = []
     for s in snapshots:
-        key = (s["match_id"], s["innings_number"], s["over_number"])
+        key = (s[0], s[2], s[3])
         if key not in done_keys:
             todo.append(s)
 
-    todo.sort(key=lambda s: (s["date"], s["match_id"], int(s["innings_number"]), int(s["over_number"])))
+    todo.sort(key=lambda s: (s[1], s[0], s[2], s[3]))
 
     print(f"\n=== fetch_per_over_odds.py ===")
     print(f"  Total high-confidence snapshots : {len(snapshots)}")
@@ -183,104 +206,111 @@ def fetch_per_over():
     print(f"  Strategy: 1 API call per unique timestamp (per-over aligned)")
     print(f"  Bookmaker priority: {', '.join(BOOKMAKER_PRIORITY[:4])}")
 
+    timestamps = estimate_over_timestamps(
+        [s[1] for s in todo], [s[2] for s in todo], [s[3] for s in todo],
+        [slot_by_match.get((s[1], s[0]), 14) for s in todo])
+
     cache = load_cache()
-    rows = list(existing_rows)
+    events_indexes = {}
     api_calls = 0
     cache_hits = 0
     found = 0
     not_found = 0
     bookmaker_counts = defaultdict(int)
 
-    for i, snap in enumerate(todo):
-        if api_calls >= MAX_API_CALLS:
-            print(f"\n  Reached API call limit ({MAX_API_CALLS})")
+    to_fetch = {}
+    n_planned = 0
+    for ts in timestamps:
+        if len(to_fetch) >= MAX_API_CALLS:
             break
-
-        mid = snap["match_id"]
-        inn = snap["innings_number"]
-        over = snap["over_number"]
-        date_str = snap["date"]
-        bat = snap["batting_team"]
-        bowl = snap["bowling_team"]
-
-        start_hour = determine_match_slot(mid, date_str, metadata_by_date)
-        ts = estimate_over_timestamp(date_str, inn, over, start_hour)
-
-        try:
-            data, was_api_call = fetch_odds_snapshot(ts, cache)
-            events = data.get("data", [])
-            if was_api_call:
-                api_calls += 1
-                time.sleep(SLEEP_BETWEEN_CALLS)
+        if ts not in cache and ts not in to_fetch:
+            data = load_cached_response(ts)
+            if data is None:
+                to_fetch[ts] = None
             else:
+                cache[ts] = data
+        n_planned += 1
+
+    failed = {}
+    write_header = not os.path.exists(OUTPUT_PATH) or os.path.getsize(OUTPUT_PATH) == 0
+    with open(OUTPUT_PATH, "a", newline="", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(OUTPUT_FIELDS)
+
+        fetched = zip(to_fetch, pool.map(fetch_snapshot_data, to_fetch))
+        for snap, ts in zip(todo[:n_planned], timestamps):
+            mid, date_str, inn, over, bat, bowl, prob, winner = snap
+
+            if ts in cache:
+                data = cache[ts]
                 cache_hits += 1
-        except Exception as e:
-            print(f"  Error {ts}: {e}", file=sys.stderr)
-            api_calls += 1
-            time.sleep(1.0)
-            continue
+            elif ts in failed:
+                print(f"  Error {ts}: {failed[ts]}", file=sys.stderr)
+                continue
+            else:
+                data, error = next(fetched)[1]
+                api_calls += 1
+                if error is not None:
+                    failed[ts] = error
+                    print(f"  Error {ts}: {error}", file=sys.stderr)
+                    continue
+                cache[ts] = data
+
+            events_index = events_indexes.get(ts)
+            if events_index is None:
+                events_index = events_indexes[ts] = build_events_index(data.get("data", []))
+
+            odds, bm_used = find_best_bookmaker_for_teams(events_index, bat, bowl)
+
+            if odds and bat in odds and bowl in odds:
+                bat_odds = odds[bat]
+                bowl_odds = odds[bowl]
+                bat_imp = 1.0 / bat_odds
+                bowl_imp = 1.0 / bowl_odds
+                total_imp = bat_imp + bowl_imp
+                bat_market_prob = bat_imp / total_imp
+                bowl_market_prob = bowl_imp / total_imp
+
+                bookmaker_counts[bm_used] += 1
+
+                edge = prob - bat_market_prob
+
+                writer.writerow((
+                    mid, date_str, inn, over,
+                    bat, bowl,
+                    round(prob, 6), winner,
+                    bat, bowl,
+                    bat_odds, bowl_odds,
+                    round(bat_market_prob, 6), round(bowl_market_prob, 6),
+                    round(edge, 6), ts, bm_used,
+                ))
+                found += 1
+
+                if found % 50 == 0:
+                    print(f"  Progress: {found} found, {not_found} missed, "
+                          f"{api_calls} API calls, {cache_hits} cache hits")
+            else:
+                not_found += 1
+
+            if (api_calls + cache_hits) % 100 == 0 and (api_calls + cache_hits) > 0:
+                out.flush()
 
-        odds, bm_used = find_best_bookmaker_for_teams(events, bat, bowl)
-
-        if odds and bat in odds and bowl in odds:
-            bat_odds = odds[bat]
-            bowl_odds = odds[bowl]
-            bat_imp = 1.0 / bat_odds
-            bowl_imp = 1.0 / bowl_odds
-            total_imp = bat_imp + bowl_imp
-            bat_market_prob = bat_imp / total_imp
-            bowl_market_prob = bowl_imp / total_imp
-
-            bookmaker_counts[bm_used] += 1
-
-            model_prob = float(snap["final_stabilized_probability"])
-            edge = model_prob - bat_market_prob
-
-            rows.append({
-                "match_id": mid,
-                "date": date_str,
-                "innings_number": inn,
-                "over_number": over,
-                "batting_team": bat,
-                "bowling_team": bowl,
-                "model_probability": round(model_prob, 6),
-                "eventual_winner": snap["eventual_winner"],
-                "market_team_1": bat,
-                "market_team_2": bowl,
-                "market_odds_1": bat_odds,
-                "market_odds_2": bowl_odds,
-                "market_prob_1": round(bat_market_prob, 6),
-                "market_prob_2": round(bowl_market_prob, 6),
-                "edge": round(edge, 6),
-                "fetch_timestamp": ts,
-                "bookmaker_used": bm_used,
-            })
-            found += 1
-
-            if found % 50 == 0:
-                print(f"  Progress: {found} found, {not_found} missed, "
-                      f"{api_calls} API calls, {cache_hits} cache hits")
-        else:
-            not_found += 1
-
-        if (api_calls + cache_hits) % 100 == 0 and (api_calls + cache_hits) > 0:
-            save_rows(rows)
-            save_cache(cache)
-
-    save_rows(rows)
-    save_cache(cache)
+    if n_planned < len(todo):
+        print(f"\n  Reached API call limit ({MAX_API_CALLS})")
 
     print(f"\n  Results:")
     print(f"    API calls              : {api_calls}")
     print(f"    Cache hits             : {cache_hits}")
     print(f"    Snapshots with odds    : {found}")
     print(f"    Snapshots without odds : {not_found}")
-    print(f"    Total rows in output   : {len(rows)}")
+    print(f"    Total rows in output   : {existing_count + found}")
     print(f"    Bookmaker breakdown    :")
     for bm, cnt in sorted(bookmaker_counts.items(), key=lambda x: -x[1]):
         print(f"      {bm}: {cnt} snapshots")
     print(f"    Output                 : {OUTPUT_PATH}")
-    print(f"    Cache                  : {CACHE_PATH}")
+    print(f"    Cache                  : {RESPONSE_CACHE_DIR}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import csv
 import os
-from collections import defaultdict
+
+import numpy as np
+import pandas as pd
 
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -9,123 +11,85 @@ STABILIZED_PATH = os.path.join(PROCESSED_DIR, "statistical_bucket_model_stabiliz
 METADATA_PATH = os.path.join(PROCESSED_DIR, "match_metadata.csv")
 OUTPUT_PATH = os.path.join(PROCESSED_DIR, "live_model_calibration_2020_plus.csv")
 
+INPUT_COLUMNS = [
+    "match_id", "innings_number", "over_number", "runs_so_far", "wickets_so_far", "balls_remaining",
+    "target", "required_run_rate", "batting_team", "eventual_winner", "elo_rating_difference",
+]
+
+OVER_LABELS = np.array(["1-3", "4-6", "7-10", "11-15", "16-20"])
+OVER_BINS = [3, 6, 10, 15]
+WICKETS_LABELS = np.array(["0-1", "2-3", "4-6", "7+"])
+WICKETS_BINS = [1, 3, 6]
+PRESSURE_LABELS = np.array(["very_low", "low", "neutral", "high", "very_high"])
+PRESSURE_BINS = [-4, -1, 1, 4]
+ELO_LABELS = np.array(["strong_disadvantage", "moderate_disadvantage", "neutral",
+                       "moderate_advantage", "strong_advantage"])
+BUCKET_FIELDS = ["over_bucket", "wickets_bucket", "run_pressure_bucket", "elo_diff_bucket"]
+
+PHASES = ["powerplay", "middle", "death"]
+PHASE_BINS = [6, 15]
+DECILES = [f"{lower}-{lower + 10}%" for lower in range(0, 100, 10)]
+HIGH_PROB_THRESHOLDS = [70, 80, 90]
+
 OUTPUT_FIELDS = [
     "decile", "sample_count", "avg_predicted_prob", "actual_win_rate", "abs_calibration_error"
 ]
 
 
 def over_bucket(over_num):
-    over_num = int(over_num)
-    if over_num <= 3:
-        return "1-3"
-    elif over_num <= 6:
-        return "4-6"
-    elif over_num <= 10:
-        return "7-10"
-    elif over_num <= 15:
-        return "11-15"
-    else:
-        return "16-20"
+    return OVER_LABELS[np.searchsorted(OVER_BINS, over_num)]
 
 
 def wickets_bucket(wickets):
-    wickets = int(wickets)
-    if wickets <= 1:
-        return "0-1"
-    elif wickets <= 3:
-        return "2-3"
-    elif wickets <= 6:
-        return "4-6"
-    else:
-        return "7+"
-
-
-def run_pressure_bucket(row):
-    innings = int(row["innings_number"])
-    if innings == 1:
-        return "first_innings"
-
-    target = row.get("target", "")
-    balls_rem = row.get("balls_remaining", "")
-    runs_so_far = row.get("runs_so_far", "")
-    over_num = row.get("over_number", "")
-
-    if target == "" or balls_rem == "" or runs_so_far == "" or over_num == "":
-        return "first_innings"
-
-    target = float(target)
-    balls_rem = float(balls_rem)
-    runs_so_far = float(runs_so_far)
-    over_num = float(over_num)
-
-    if over_num > 0:
-        current_rr = (runs_so_far / (over_num * 6)) * 6
-    else:
-        current_rr = 0.0
-
-    rrr_val = float(row.get("required_run_rate", 0))
-    pressure = rrr_val - current_rr
-
-    if pressure <= -4:
-        return "very_low"
-    elif pressure <= -1:
-        return "low"
-    elif pressure <= 1:
-        return "neutral"
-    elif pressure <= 4:
-        return "high"
-    else:
-        return "very_high"
+    return WICKETS_LABELS[np.searchsorted(WICKETS_BINS, wickets)]
+
+
+def run_pressure_bucket(df):
+    over_num = df["over_number"].to_numpy(dtype=float)
+    runs_so_far = df["runs_so_far"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_rr = np.where(over_num > 0, (runs_so_far / (over_num * 6)) * 6, 0.0)
+    pressure = df["required_run_rate"].to_numpy(dtype=float) - current_rr
+
+    first_innings = ((df["innings_number"].to_numpy() == 1)
+                     | df[["target", "balls_remaining", "runs_so_far", "over_number"]].isna().any(axis=1).to_numpy())
+    return np.where(first_innings, "first_innings", PRESSURE_LABELS[np.searchsorted(PRESSURE_BINS, pressure)])
 
 
 def elo_diff_bucket(elo_diff):
-    if elo_diff == "":
-        return "neutral"
-    elo_diff = float(elo_diff)
-    if elo_diff > 75:
-        return "strong_advantage"
-    elif elo_diff > 25:
-        return "moderate_advantage"
-    elif elo_diff >= -25:
-        return "neutral"
-    elif elo_diff >= -75:
-        return "moderate_disadvantage"
-    else:
-        return "strong_disadvantage"
+    code = np.searchsorted([-75, -25], elo_diff, side="right") + np.searchsorted([25, 75], elo_diff)
+    return np.where(np.isnan(elo_diff), "neutral", ELO_LABELS[code])
 
 
 def get_over_phase(over_num):
-    over_num = int(over_num)
-    if over_num <= 6:
-        return "powerplay"
-    elif over_num <= 15:
-        return "middle"
-    else:
-        return "death"
+    return np.searchsorted(PHASE_BINS, over_num)
 
 
 def get_decile(prob):
-    if prob >= 1.0:
-        return "90-100%"
-    decile_idx = int(prob * 10)
-    lower = decile_idx * 10
-    upper = lower + 10
-    return f"{lower}-{upper}%"
+    return np.minimum((prob * 10).astype(np.int64), 9)
+
+
+def read_processed(path, columns, **csv_kwargs):
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet_path, columns=columns, engine="pyarrow")
+    return pd.read_csv(path, usecols=columns, **csv_kwargs)
 
 
 def load_stabilized_model():
-    with open(STABILIZED_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    lookup = {}
-    for r in rows:
-        key = (r["over_bucket"], r["wickets_bucket"], r["run_pressure_bucket"], r["elo_diff_bucket"])
-        lookup[key] = float(r["final_stabilized_probability"])
-    return lookup
+    model = pd.read_csv(STABILIZED_PATH, usecols=BUCKET_FIELDS + ["final_stabilized_probability"],
+                        dtype={f: str for f in BUCKET_FIELDS}, keep_default_na=False,
+                        float_precision="round_trip")
+    model = model.drop_duplicates(BUCKET_FIELDS, keep="last")
+    return model.set_index(BUCKET_FIELDS)["final_stabilized_probability"]
 
 
 def load_match_dates():
     with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        return {r["match_id"]: r["date"] for r in csv.DictReader(f)}
+        reader = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(reader))}
+        mid_i, date_i = col["match_id"], col["date"]
+        return {row[mid_i]: row[date_i] for row in reader}
 
 
 def live_model_calibration():
@@ -134,71 +98,55 @@ def live_model_calibration():
     model_lookup = load_stabilized_model()
     match_dates = load_match_dates()
 
-    with open(ENRICHED_PATH, "r", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
+    all_rows = read_processed(ENRICHED_PATH, INPUT_COLUMNS, float_precision="round_trip")
+    all_rows["match_id"] = all_rows["match_id"].astype(str)
 
-    rows_2020 = [r for r in all_rows if match_dates.get(r["match_id"], "") >= "2020-01-01"]
+    rows_2020 = all_rows[all_rows["match_id"].map(match_dates).fillna("") >= "2020-01-01"]
 
     print(f"\n=== live_model_calibration.py ===")
     print(f"  Total enriched snapshots   : {len(all_rows)}")
     print(f"  2020+ snapshots            : {len(rows_2020)}")
 
-    decile_data = defaultdict(lambda: {"count": 0, "wins": 0, "sum_pred": 0.0})
-    phase_data = defaultdict(lambda: {"count": 0, "sum_brier": 0.0})
-    overall_brier_sum = 0.0
-    overall_count = 0
-    high_prob_counts = {70: 0, 80: 0, 90: 0}
-    high_prob_wins = {70: 0, 80: 0, 90: 0}
-    no_bucket = 0
-
-    for row in rows_2020:
-        ob = over_bucket(row["over_number"])
-        wb = wickets_bucket(row["wickets_so_far"])
-        rpb = run_pressure_bucket(row)
-        edb = elo_diff_bucket(row.get("elo_rating_difference", ""))
-
-        key = (ob, wb, rpb, edb)
-        prob = model_lookup.get(key)
-        if prob is None:
-            no_bucket += 1
-            continue
-
-        batting_team = row["batting_team"]
-        winner = row["eventual_winner"]
-        batting_won = 1 if batting_team == winner else 0
-
-        brier = (prob - batting_won) ** 2
-
-        decile = get_decile(prob)
-        decile_data[decile]["count"] += 1
-        decile_data[decile]["wins"] += batting_won
-        decile_data[decile]["sum_pred"] += prob
-
-        phase = get_over_phase(row["over_number"])
-        phase_data[phase]["count"] += 1
-        phase_data[phase]["sum_brier"] += brier
-
-        overall_brier_sum += brier
-        overall_count += 1
-
-        prob_pct = prob * 100
-        for threshold in [70, 80, 90]:
-            if prob_pct >= threshold:
-                high_prob_counts[threshold] += 1
-                high_prob_wins[threshold] += batting_won
-
-    overall_brier = overall_brier_sum / overall_count if overall_count > 0 else 0
-
-    decile_order = ["0-10%", "10-20%", "20-30%", "30-40%", "40-50%",
-                    "50-60%", "60-70%", "70-80%", "80-90%", "90-100%"]
+    keys = pd.MultiIndex.from_arrays([
+        over_bucket(rows_2020["over_number"].to_numpy()),
+        wickets_bucket(rows_2020["wickets_so_far"].to_numpy()),
+        run_pressure_bucket(rows_2020),
+        elo_diff_bucket(rows_2020["elo_rating_difference"].to_numpy(dtype=float)),
+    ], names=BUCKET_FIELDS)
+    probs = model_lookup.reindex(keys).to_numpy()
+    scored = ~np.isnan(probs)
+    no_bucket = int((~scored).sum())
+
+    prob = probs[scored]
+    batting_won = (rows_2020["batting_team"] == rows_2020["eventual_winner"]).to_numpy()[scored].astype(float)
+    brier = (prob - batting_won) ** 2
+
+    decile = get_decile(prob)
+    decile_count = np.bincount(decile, minlength=len(DECILES))
+    decile_wins = np.bincount(decile, weights=batting_won, minlength=len(DECILES))
+    decile_sum_pred = np.bincount(decile, weights=prob, minlength=len(DECILES))
+
+    phase = get_over_phase(rows_2020["over_number"].to_numpy()[scored])
+    phase_count = np.bincount(phase, minlength=len(PHASES))
+    phase_sum_brier = np.bincount(phase, weights=brier, minlength=len(PHASES))
+
+    overall_count = len(prob)
+    overall_brier = brier.sum() / overall_count if overall_count > 0 else 0
+
+    prob_pct = prob * 100
+    high_prob_counts = {}
+    high_prob_wins = {}
+    for threshold in HIGH_PROB_THRESHOLDS:
+        high = prob_pct >= threshold
+        high_prob_counts[threshold] = int(high.sum())
+        high_prob_wins[threshold] = int(batting_won[high].sum())
 
     output_rows = []
-    for d in decile_order:
-        dd = decile_data[d]
-        count = dd["count"]
+    for i, d in enumerate(DECILES):
+        count = int(decile_count[i])
         if count > 0:
-            avg_pred = dd["sum_pred"] / count
-            actual_wr = dd["wins"] / count
+            avg_pred = decile_sum_pred[i] / count
+            actual_wr = decile_wins[i] / count
             cal_err = abs(actual_wr - avg_pred)
         else:
             avg_pred = 0
@@ -230,14 +178,13 @@ def live_model_calibration():
     print(f"  Buckets not found          : {no_bucket}")
 
     print(f"\n  Brier Score by Phase:")
-    for phase in ["powerplay", "middle", "death"]:
-        pd = phase_data[phase]
-        if pd["count"] > 0:
-            phase_brier = pd["sum_brier"] / pd["count"]
-            print(f"    {phase:>10s}: {phase_brier:.6f} ({pd['count']} snapshots)")
+    for i, phase_name in enumerate(PHASES):
+        if phase_count[i] > 0:
+            phase_brier = phase_sum_brier[i] / phase_count[i]
+            print(f"    {phase_name:>10s}: {phase_brier:.6f} ({phase_count[i]} snapshots)")
 
     print(f"\n  Sharpness (High-Probability States):")
-    for threshold in [70, 80, 90]:
+    for threshold in HIGH_PROB_THRESHOLDS:
         cnt = high_prob_counts[threshold]
         wins = high_prob_wins[threshold]
         pct = (cnt / overall_count * 100) if overall_count > 0 else 0
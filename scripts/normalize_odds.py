@@ -1,6 +1,8 @@
-import csv
 import os
 
+import numpy as np
+import pandas as pd
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 INPUT_PATH = os.path.join(PROCESSED_DIR, "historical_odds_raw.csv")
@@ -19,52 +21,37 @@ OUTPUT_FIELDS = [
 def normalize_odds():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-
-    output_rows = []
-
-    for row in rows:
-        t1_odds = float(row["team_1_odds"])
-        t2_odds = float(row["team_2_odds"])
+    df = pd.read_csv(INPUT_PATH, dtype=str, keep_default_na=False)
 
-        t1_implied = 1.0 / t1_odds
-        t2_implied = 1.0 / t2_odds
+    t1_odds = df["team_1_odds"].to_numpy(dtype=np.float64)
+    t2_odds = df["team_2_odds"].to_numpy(dtype=np.float64)
 
-        overround = t1_implied + t2_implied
+    t1_implied = 1.0 / t1_odds
+    t2_implied = 1.0 / t2_odds
 
-        t1_market_prob = t1_implied / overround
-        t2_market_prob = t2_implied / overround
+    overround = t1_implied + t2_implied
 
-        output_rows.append({
-            "match_id": row["match_id"],
-            "date": row["date"],
-            "team_1": row["team_1"],
-            "team_2": row["team_2"],
-            "bookmaker_name": row["bookmaker_name"],
-            "team_1_odds": t1_odds,
-            "team_2_odds": t2_odds,
-            "team_1_implied_prob": round(t1_implied, 6),
-            "team_2_implied_prob": round(t2_implied, 6),
-            "market_overround": round(overround, 6),
-            "team_1_market_prob": round(t1_market_prob, 6),
-            "team_2_market_prob": round(t2_market_prob, 6),
-            "snapshot_timestamp": row["snapshot_timestamp"],
-        })
+    t1_market_prob = t1_implied / overround
+    t2_market_prob = t2_implied / overround
 
-    with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
-        writer.writeheader()
-        writer.writerows(output_rows)
+    output = df.assign(
+        team_1_odds=t1_odds,
+        team_2_odds=t2_odds,
+        team_1_implied_prob=t1_implied.round(6),
+        team_2_implied_prob=t2_implied.round(6),
+        market_overround=overround.round(6),
+        team_1_market_prob=t1_market_prob.round(6),
+        team_2_market_prob=t2_market_prob.round(6),
+    )[OUTPUT_FIELDS]
+    output.to_csv(OUTPUT_PATH, index=False, lineterminator="\r\n")
 
     print("\n=== normalize_odds.py Summary ===")
-    print(f"  Total rows processed       : {len(output_rows)}")
-    if output_rows:
-        avg_overround = sum(float(r["market_overround"]) for r in output_rows) / len(output_rows)
-        print(f"  Average market overround   : {avg_overround:.4f}")
+    print(f"  Total rows processed       : {len(output)}")
+    if len(output):
+        print(f"  Average market overround   : {output['market_overround'].mean():.4f}")
     print(f"  Output                     : {OUTPUT_PATH}")
 
-    return output_rows
+    return output
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+RESPONSE_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "cache", "odds")
+
+BASE_URL = "https://api.the-odds-api.com/v4/historical/sports/cricket_ipl/odds"
+REGION = "eu"
+MARKET = "h2h"
+ODDS_FORMAT = "decimal"
+RATE_LIMIT_PER_SEC = 2.0
+RATE_LIMIT_BURST = 10
+MAX_WORKERS = 4
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, capacity):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_sec)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate_per_sec
+        if wait > 0:
+            time.sleep(wait)
+
+
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS * 2,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504), raise_on_status=False),
+))
+
+RATE_LIMITER = TokenBucket(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST)
+
+
+def parse_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def response_cache_path(timestamp):
+    key = f"{REGION}|{MARKET}|{ODDS_FORMAT}|{timestamp}"
+    return os.path.join(RESPONSE_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json.gz")
+
+
+def load_cached_response(timestamp):
+    path = response_cache_path(timestamp)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return parse_json(gzip.decompress(f.read()))
+
+
+def save_cached_response(timestamp, body):
+    path = response_cache_path(timestamp)
+    os.makedirs(RESPONSE_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(gzip.compress(body, compresslevel=3))
+    os.replace(tmp_path, path)
@@ -1,6 +1,9 @@
 import csv
 import os
 
+import numpy as np
+import pandas as pd
+
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 INPUT_PATH = os.path.join(PROCESSED_DIR, "high_confidence_inplay_odds.csv")
@@ -8,6 +11,9 @@ OUTPUT_PATH = os.path.join(PROCESSED_DIR, "live_edge_simulation_results.csv")
 
 THRESHOLDS = [0.05, 0.07, 0.10, 0.15]
 
+INPUT_COLUMNS = ["date", "match_id", "innings_number", "over_number",
+                 "edge", "market_odds_1", "batting_team", "eventual_winner"]
+
 OUTPUT_FIELDS = [
     "threshold", "total_trades", "wins", "losses",
     "win_rate", "total_staked", "total_return",
@@ -15,51 +21,19 @@ OUTPUT_FIELDS = [
 ]
 
 
-def run_simulation(rows, threshold):
-    seen_matches = set()
-    trades = []
-    bankroll_history = [0.0]
-    peak = 0.0
-    max_drawdown = 0.0
-
-    for row in rows:
-        mid = row["match_id"]
-        edge = float(row["edge"])
-        model_prob = float(row["model_probability"])
-        market_odds = float(row["market_odds_1"])
-        batting_team = row["batting_team"]
-        winner = row["eventual_winner"]
-
-        if edge < threshold:
-            continue
-
-        if mid in seen_matches:
-            continue
-        seen_matches.add(mid)
-
-        won = (batting_team == winner)
-        pnl = (market_odds - 1.0) if won else -1.0
-
-        trades.append({
-            "match_id": mid,
-            "batting_team": batting_team,
-            "over": row["over_number"],
-            "innings": row["innings_number"],
-            "model_prob": model_prob,
-            "market_prob": float(row["market_prob_1"]),
-            "edge": edge,
-            "odds": market_odds,
-            "won": won,
-            "pnl": pnl,
-        })
-
-        cumulative = bankroll_history[-1] + pnl
-        bankroll_history.append(cumulative)
-        peak = max(peak, cumulative)
-        dd = peak - cumulative
-        max_drawdown = max(max_drawdown, dd)
-
-    total = len(trades)
+def run_simulation(df, threshold):
+    mask = df["edge"].to_numpy() >= threshold
+    _, first = np.unique(df["match_id"].to_numpy()[mask], return_index=True)
+    sel = np.flatnonzero(mask)[np.sort(first)]
+
+    won = (df["batting_team"].to_numpy() == df["eventual_winner"].to_numpy())[sel]
+    pnl = np.where(won, df["market_odds_1"].to_numpy()[sel] - 1.0, -1.0)
+
+    bankroll = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(bankroll, 0.0))
+    max_drawdown = float((peak - bankroll).max(initial=0.0))
+
+    total = len(pnl)
     if total == 0:
         return {
             "threshold": threshold,
@@ -69,10 +43,10 @@ def run_simulation(rows, threshold):
             "max_drawdown": 0, "max_drawdown_pct": 0,
         }
 
-    wins = sum(1 for t in trades if t["won"])
+    wins = int(won.sum())
     losses = total - wins
     total_staked = total
-    profit = round(sum(t["pnl"] for t in trades), 2)
+    profit = round(float(bankroll[-1]), 2)
     total_return = round(profit + total_staked, 2)
     roi = round((profit / total_staked) * 100, 2) if total_staked > 0 else 0
     win_rate = round(wins / total, 4)
@@ -96,16 +70,16 @@ def run_simulation(rows, threshold):
 def simulate_live_edge():
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
-
-    all_rows.sort(key=lambda r: (r["date"], r["match_id"], int(r["innings_number"]), int(r["over_number"])))
+    all_rows = pd.read_csv(INPUT_PATH, usecols=INPUT_COLUMNS, dtype={"match_id": str},
+                           float_precision="round_trip")
+    all_rows = all_rows.sort_values(["date", "match_id", "innings_number", "over_number"],
+                                    kind="stable", ignore_index=True)
 
     print(f"\n=== simulate_live_edge_85_plus.py ===")
     print(f"  Total in-play odds rows    : {len(all_rows)}")
-    print(f"  Unique matches             : {len(set(r['match_id'] for r in all_rows))}")
+    print(f"  Unique matches             : {all_rows['match_id'].nunique()}")
 
-    avg_edge = sum(float(r["edge"]) for r in all_rows) / len(all_rows) if all_rows else 0
+    avg_edge = all_rows["edge"].mean() if len(all_rows) else 0
     print(f"  Average edge               : {avg_edge:.4f}")
 
     results = []